@@ -0,0 +1,210 @@
+"""Este modulo ejecuta experimentos en lote.
+
+Un experimento resuelve cada instancia con cada algoritmo varias veces. Cada
+ejecucion (instancia, algoritmo, repeticion) es un trabajo independiente con
+su propia semilla, derivada de la semilla del experimento, por lo que los
+resultados no dependen de como se repartan los trabajos entre procesos.
+
+Los trabajos se reparten en un pool de procesos. Como los trabajos se
+ordenan por instancia, cada proceso guarda solo la ultima instancia leida y
+la reutiliza en los trabajos siguientes. Los resultados se escriben a medida
+que terminan, en formato CSV o JSON lines. Si un trabajo no puede ejecutarse
+(por ejemplo, el algoritmo exacto sobre una instancia grande) o falla, su
+fila indica el motivo en la columna error y el experimento continua.
+"""
+
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import copy
+from random import Random
+from typing import TextIO
+import csv
+import json
+import os
+import sys
+import bound
+import construct
+import load
+import problem
+import search
+
+# Columnas de cada resultado
+FIELDS = ["instance", "algo", "repeat", "seed", "length", "time", "niters",
+          "nevals", "bound", "gap", "error"]
+
+# Formatos de salida
+CSV = "csv"
+JSONL = "jsonl"
+
+
+def instance_files(path: str) -> list[str]:
+    """Determina las instancias a resolver.
+
+    Argumentos:
+    ==========
+    path: str
+        un archivo ".tsp" o un directorio con archivos ".tsp"
+
+    Retorno:
+    =======
+    files: list[str]
+        rutas de las instancias, en orden alfabetico
+    """
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(os.path.join(path, name) for name in os.listdir(path)
+                  if name.endswith(".tsp"))
+
+
+def run(instances: list[str], algos: list[str], repeats: int = 1,
+        jobs: int = 1, seed: int | None = None, output: str | None = None,
+        options: dict | None = None) -> None:
+    """Ejecuta un experimento y escribe sus resultados.
+
+    Argumentos:
+    ==========
+    instances: list[str]
+        rutas de las instancias
+    algos: list[str]
+        nombres de los algoritmos, ver search.ALGO_NAMES
+    repeats: int
+        cantidad de ejecuciones de cada algoritmo sobre cada instancia
+    jobs: int
+        cantidad de procesos
+    seed: int | None
+        semilla del experimento
+    output: str | None
+        archivo de salida, en formato JSON lines si termina en ".jsonl" o
+        ".json" y CSV si no, None para escribir CSV por salida estandar
+    options: dict | None
+        opciones de cada ejecucion: moves, neighbors, init, time_limit,
+        lazy, cache, bound y stop_gap, con los mismos significados que en la
+        linea de comandos
+    """
+    options = dict(options or {})
+    base = Random().getrandbits(64) if seed is None else seed
+    tasks = [(instance, algo, repeat,
+              Random("{}:{}:{}:{}".format(base, os.path.basename(instance),
+                                          algo, repeat)).getrandbits(64))
+             for instance in instances
+             for algo in algos
+             for repeat in range(repeats)]
+
+    fmt = JSONL if output and output.endswith((".jsonl", ".json")) else CSV
+    out = sys.stdout if output is None else open(output, "w", newline="")
+    try:
+        write = _writer(out, fmt)
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = [pool.submit(_solve, *task, options)
+                           for task in tasks]
+                for future in as_completed(futures):
+                    write(future.result())
+        else:
+            for task in tasks:
+                write(_solve(*task, options))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def _writer(out: TextIO, fmt: str):
+    """Funcion que escribe un resultado y vacia el buffer de salida."""
+    if fmt == JSONL:
+        def write(row: dict) -> None:
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+    else:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+
+        def write(row: dict) -> None:
+            writer.writerow(row)
+            out.flush()
+    return write
+
+
+# Ultima instancia leida por el proceso:
+# ruta -> (problema, estado inicial, cota inferior)
+_problems = {}
+
+
+def _load(instance: str, options: dict
+          ) -> tuple[problem.TSP, list[int] | None, float | None]:
+    """Lee una instancia, salvo que sea la ultima leida por el proceso.
+
+    El estado inicial solo se guarda si es construido, pues el aleatorio
+    se sortea en cada ejecucion. La cota inferior solo se calcula si se
+    pide la brecha o detenerse con ella.
+    """
+    if instance not in _problems:
+        G, coords = load.read_tsp(instance,
+                                  cache=options.get("cache", True),
+                                  lazy=options.get("lazy", False))
+        p = problem.TSP(G, k=options.get("neighbors"))
+        init = None
+        if options.get("init") in construct.CONSTRUCTION_NAMES:
+            init = construct.build(options["init"], p, coords)
+        lower = None
+        if options.get("bound") or options.get("stop_gap") is not None:
+            lower = bound.lower_bound(p,
+                                      time_limit=options.get("time_limit"))
+        _problems.clear()
+        _problems[instance] = (p, init, lower)
+    return _problems[instance]
+
+
+def _solve(instance: str, algo: str, repeat: int, seed: int,
+           options: dict) -> dict:
+    """Ejecuta un trabajo del experimento.
+
+    Un error en el trabajo no interrumpe el experimento: se informa en la
+    columna error de su fila.
+
+    Retorno:
+    =======
+    row: dict
+        el resultado, con las columnas de FIELDS
+    """
+    try:
+        return _execute(instance, algo, repeat, seed, options)
+    except Exception as e:
+        return _row(instance, algo, repeat, seed,
+                    error="{}: {}".format(type(e).__name__, e))
+
+
+def _execute(instance: str, algo: str, repeat: int, seed: int,
+             options: dict) -> dict:
+    """Ejecuta un trabajo del experimento, ver _solve."""
+    shared, init, lower = _load(instance, options)
+    rng = Random(seed)
+    # copia superficial: comparte la matriz y las listas de candidatos
+    p = copy(shared)
+    p.rng = Random(rng.getrandbits(64))
+    if init is None:
+        p.random_reset()
+    else:
+        p.init = list(init)
+    moves = tuple(options.get("moves", [problem.TWO_OPT]))
+    solver = search.make_search(algo, moves, rng.getrandbits(64),
+                                time_limit=options.get("time_limit"))
+    if isinstance(solver, search.ExactHeldKarp) and not solver.fits(p.n):
+        return _row(instance, algo, repeat, seed,
+                    error="skipped: {} cities, at most {} supported".format(
+                        p.n, solver.MAX_N))
+    if lower is not None and options.get("stop_gap") is not None:
+        solver.stop_within(lower, options["stop_gap"])
+    solver.solve(p)
+    return _row(instance, algo, repeat, seed, length=-solver.value,
+                time=round(solver.time, 4), niters=solver.niters,
+                nevals=solver.nevals, bound=lower,
+                gap=None if lower is None else
+                round(bound.gap(solver.value, lower), 6))
+
+
+def _row(instance: str, algo: str, repeat: int, seed: int, **values) -> dict:
+    """Fila de resultados, con None en las columnas que no se dan."""
+    row = dict.fromkeys(FIELDS)
+    row.update(instance=os.path.basename(instance), algo=algo,
+               repeat=repeat, seed=seed, **values)
+    return row
@@ -0,0 +1,165 @@
+"""Este modulo calcula cotas inferiores para el Problema del Viajante.
+
+Se usa la cota de Held y Karp: un 1-arbol es un arbol generador de las
+ciudades 1..n-1 mas dos aristas que unen a la ciudad 0 con el arbol. Todo
+tour es un 1-arbol en el que cada ciudad tiene grado 2, por lo que el
+1-arbol minimo es una cota inferior del tour optimo.
+
+Para mejorar la cota se suma a cada ciudad c un potencial pi[c] en todas
+sus aristas, lo que suma 2*sum(pi) al largo de todo tour sin cambiar el
+tour optimo, pero si cambia el 1-arbol minimo. Los potenciales se ajustan
+por optimizacion por subgradiente: se suben en las ciudades de grado mayor
+a 2 y se bajan en las hojas, acercando el 1-arbol a un tour.
+
+Con la cota se mide la brecha (gap) de una solucion, es decir, cuanto mas
+largo que la cota es su tour, lo que acota cuan lejos esta del optimo.
+"""
+
+from __future__ import annotations
+from time import time
+from problem import TSP
+from distance import CoordDistances
+import construct
+import math
+import numpy as np
+
+# Trabajo maximo de la cota por defecto, en pares de ciudades evaluados
+MAX_WORK = 500_000_000
+
+
+def one_tree(dist: np.ndarray, pi: np.ndarray) -> tuple[float, np.ndarray]:
+    """Calcula el 1-arbol minimo con los costos dist[i, j] + pi[i] + pi[j].
+
+    El arbol de las ciudades 1..n-1 se construye con el algoritmo de Prim,
+    en O(n^2).
+
+    Argumentos:
+    ==========
+    dist: np.ndarray
+        matriz de distancias de n x n (densa o implicita)
+    pi: np.ndarray
+        potencial de cada ciudad
+
+    Retorno:
+    =======
+    length: float
+        costo del 1-arbol, con los potenciales
+    degree: np.ndarray
+        grado de cada ciudad en el 1-arbol
+    """
+    n = len(pi)
+    degree = np.zeros(n, dtype=np.intp)
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[:2] = True  # la ciudad 0 no es parte del arbol
+    best = np.asarray(dist[1], dtype=np.float64) + pi + pi[1]
+    best[in_tree] = np.inf
+    link = np.ones(n, dtype=np.intp)
+    length = 0.0
+    for _ in range(n - 2):
+        v = int(np.argmin(best))
+        length += best[v]
+        degree[v] += 1
+        degree[link[v]] += 1
+        in_tree[v] = True
+        best[v] = np.inf
+        row = dist[v] + pi + pi[v]
+        closer = ~in_tree & (row < best)
+        best[closer] = row[closer]
+        link[closer] = v
+
+    # las dos aristas mas baratas de la ciudad 0
+    costs = dist[0][1:] + pi[1:] + pi[0]
+    two = np.argpartition(costs, 1)[:2]
+    length += float(costs[two].sum())
+    degree[0] = 2
+    degree[two + 1] += 1
+    return float(length), degree
+
+
+def lower_bound(problem: TSP, upper: float | None = None,
+                max_iters: int | None = None,
+                time_limit: float | None = None) -> float:
+    """Calcula la cota de Held y Karp del largo del tour optimo.
+
+    El paso del subgradiente es lambda * (upper - w) / |g|^2, donde w es
+    la cota actual y g el vector de grados menos 2. lambda arranca en 2 y
+    se divide a la mitad cada vez que la cota no mejora durante varias
+    iteraciones. Si las distancias son enteras, la cota se redondea hacia
+    arriba.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un problema del viajante
+    upper: float | None
+        largo de algun tour, None para usar el del vecino mas cercano
+    max_iters: int | None
+        cantidad maxima de iteraciones del subgradiente, None para usar
+        MAX_WORK / n^2 entre 10 y 500, pues cada 1-arbol cuesta O(n^2)
+    time_limit: float | None
+        tiempo maximo en segundos, None para no limitarlo
+
+    Retorno:
+    =======
+    bound: float
+        una cota inferior del largo del tour optimo
+    """
+    start = time()
+    n, dist = problem.n, problem.dist
+    if n <= 3:
+        return -problem.obj_val(problem.init)
+    if upper is None:
+        upper = -problem.obj_val(construct.nearest_neighbor(problem))
+
+    if max_iters is None:
+        max_iters = min(500, max(10, MAX_WORK // (n * n)))
+    pi = np.zeros(n)
+    best = -np.inf
+    step, patience, stale = 2.0, max(10, n // 10), 0
+    for _ in range(max_iters):
+        length, degree = one_tree(dist, pi)
+        w = length - 2 * pi.sum()
+        if w > best + 1e-9:
+            best, stale = w, 0
+        else:
+            stale += 1
+            if stale >= patience:
+                step, stale = step / 2, 0
+        g = degree - 2
+        norm = float(g @ g)
+        if norm == 0:  # el 1-arbol es un tour: la cota es optima
+            break
+        if step < 1e-3 or upper <= best:
+            break
+        if time_limit is not None and time() - start >= time_limit:
+            break
+        pi += step * (upper - w) / norm * g
+
+    if _integral(dist):
+        best = math.ceil(best - 1e-6)
+    return float(min(best, upper))
+
+
+def gap(value: float, bound: float) -> float:
+    """Brecha relativa de una solucion respecto de una cota inferior.
+
+    Argumentos:
+    ==========
+    value: float
+        valor objetivo de la solucion, es decir, menos el largo del tour
+    bound: float
+        cota inferior del largo del tour optimo
+
+    Retorno:
+    =======
+    gap: float
+        (largo - cota) / cota, 0 si el tour es optimo
+    """
+    return (-value - bound) / bound if bound > 0 else 0.0
+
+
+def _integral(dist: np.ndarray | CoordDistances) -> bool:
+    """Determina si todas las distancias son enteras."""
+    if isinstance(dist, CoordDistances):
+        return True  # las distancias de TSPLIB se redondean
+    return bool(np.all(np.mod(dist, 1) == 0))
@@ -0,0 +1,370 @@
+"""Este modulo define heuristicas de construccion de tours.
+
+Cada heuristica devuelve un estado del TSP, es decir, una lista de la forma
+[0] ++ permutacion(1,n) ++ [0], que puede usarse como estado inicial de las
+busquedas locales (problem.init). Partir de un buen tour evita que las
+busquedas gasten la mayor parte de sus iteraciones en mejoras evidentes.
+
+* nearest_neighbor: vecino mas cercano. Desde una ciudad, se mueve siempre
+a la ciudad no visitada mas cercana.
+
+* greedy: aristas golosas. Agrega las aristas de menor a mayor largo mientras
+no formen ciclos ni dejen ciudades de grado 3, y luego une los caminos.
+
+* space_filling_curve: curva de Hilbert. Recorre las ciudades en el orden en
+que las visita la curva de Hilbert sobre sus coordenadas.
+
+* christofides: version simplificada del algoritmo de Christofides. Arbol
+generador minimo sobre las aristas candidatas mas un apareamiento goloso de
+las ciudades de grado impar, recorrido euleriano y atajos.
+"""
+
+from __future__ import annotations
+from problem import TSP, nearest_neighbors
+from node import State
+import numpy as np
+
+# Heuristicas de construccion
+NEAREST_NEIGHBOR = "nn"
+GREEDY = "greedy"
+SPACE_FILLING_CURVE = "hilbert"
+CHRISTOFIDES = "christofides"
+CONSTRUCTION_NAMES = [NEAREST_NEIGHBOR, GREEDY, SPACE_FILLING_CURVE,
+                      CHRISTOFIDES]
+
+# Vecinos cercanos a usar si el problema no tiene listas de candidatos
+K = 10
+
+
+def build(name: str, problem: TSP,
+          coords: dict[int, tuple[float, float]] | np.ndarray | None = None
+          ) -> State:
+    """Construye un tour con la heuristica indicada.
+
+    Argumentos:
+    ==========
+    name: str
+        nombre de la heuristica, uno de CONSTRUCTION_NAMES
+    problem: TSP
+        un problema del viajante
+    coords: dict[int, tuple[float, float]] | np.ndarray | None
+        coordenadas de las ciudades, solo necesarias para la curva
+
+    Retorno:
+    =======
+    state: State
+        un estado del TSP
+    """
+    if name == NEAREST_NEIGHBOR:
+        return nearest_neighbor(problem)
+    if name == GREEDY:
+        return greedy(problem)
+    if name == SPACE_FILLING_CURVE:
+        return space_filling_curve(coords)
+    if name == CHRISTOFIDES:
+        return christofides(problem)
+    raise ValueError("Unknown construction heuristic: {}".format(name))
+
+
+def nearest_neighbor(problem: TSP, start: int = 0) -> State:
+    """Construye un tour con la heuristica del vecino mas cercano.
+
+    Primero se buscan ciudades libres entre los candidatos de la ciudad
+    actual, y solo si estan todos visitados se recorre su fila completa.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un problema del viajante
+    start: int
+        ciudad de inicio
+
+    Retorno:
+    =======
+    state: State
+        un estado del TSP
+    """
+    n, dist = problem.n, problem.dist
+    neighbors = _neighbors(problem)
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
+    city = start
+    for _ in range(n - 1):
+        free = neighbors[city][~visited[neighbors[city]]]
+        if len(free):
+            city = int(free[0])
+        else:
+            row = np.where(visited, np.inf, dist[city])
+            city = int(np.argmin(row))
+        order.append(city)
+        visited[city] = True
+    return _close(order)
+
+
+def greedy(problem: TSP) -> State:
+    """Construye un tour con la heuristica de aristas golosas.
+
+    Solo se consideran las aristas entre cada ciudad y sus candidatos.
+    Los caminos resultantes se unen recorriendolos uno tras otro, saltando
+    siempre al extremo libre mas cercano.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un problema del viajante
+
+    Retorno:
+    =======
+    state: State
+        un estado del TSP
+    """
+    n, dist = problem.n, problem.dist
+    neighbors = _neighbors(problem)
+
+    # aristas candidatas sin repetir, de menor a mayor largo
+    u = np.repeat(np.arange(n), neighbors.shape[1])
+    v = neighbors.ravel()
+    codes = np.unique(np.minimum(u, v) * n + np.maximum(u, v))
+    u, v = codes // n, codes % n
+    edges = np.stack((u, v), axis=1)[np.argsort(dist[u, v], kind="stable")]
+
+    degree = np.zeros(n, dtype=np.intp)
+    parent = list(range(n))  # union-find de los caminos
+    adj = [[] for _ in range(n)]
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    for a, b in edges.tolist():
+        if degree[a] < 2 and degree[b] < 2:
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[ra] = rb
+                degree[a] += 1
+                degree[b] += 1
+                adj[a].append(b)
+                adj[b].append(a)
+
+    # unir los caminos: recorrer cada uno y saltar al extremo mas cercano
+    ends = np.flatnonzero(degree < 2)
+    free = np.ones(n, dtype=bool)
+    order = []
+    city = int(ends[0]) if len(ends) else 0
+    while True:
+        prev = -1
+        while True:
+            order.append(city)
+            free[city] = False
+            nxt = [c for c in adj[city] if c != prev and free[c]]
+            if not nxt:
+                break
+            prev, city = city, nxt[0]
+        ends = ends[free[ends]]
+        if not len(ends):
+            break
+        city = int(ends[np.argmin(dist[city, ends])])
+    return _close(order)
+
+
+def space_filling_curve(
+        coords: dict[int, tuple[float, float]] | np.ndarray) -> State:
+    """Construye un tour siguiendo la curva de Hilbert.
+
+    Las coordenadas se llevan a una grilla de 2^16 x 2^16 y las ciudades
+    se ordenan segun su indice sobre la curva, en O(n log n).
+
+    Argumentos:
+    ==========
+    coords: dict[int, tuple[float, float]] | np.ndarray
+        coordenadas de las ciudades, como las devuelve load.read_tsp
+        (ciudades de 1 a n) o como matriz de n x 2
+
+    Retorno:
+    =======
+    state: State
+        un estado del TSP
+    """
+    if coords is None or not len(coords):
+        raise ValueError("The space filling curve needs city coordinates")
+    xy = coord_array(coords)
+    bits = 16
+    side = (1 << bits) - 1
+    low, span = xy.min(axis=0), np.ptp(xy, axis=0).max()
+    grid = np.zeros(xy.shape, dtype=np.int64) if span == 0 else \
+        np.rint((xy - low) / span * side).astype(np.int64)
+    return _close(np.argsort(_hilbert_index(grid[:, 0], grid[:, 1], bits),
+                             kind="stable").tolist())
+
+
+def christofides(problem: TSP) -> State:
+    """Construye un tour con una version simplificada de Christofides.
+
+    El arbol generador minimo se arma con Kruskal sobre las aristas entre
+    cada ciudad y sus candidatos, y solo si esas aristas no conectan el
+    grafo se usa Prim sobre la matriz completa. En lugar de un apareamiento
+    perfecto de costo minimo, las ciudades de grado impar se aparean de
+    forma golosa con las aristas candidatas de menor a mayor largo, y las
+    que quedan libres con la ciudad impar libre mas cercana.
+
+    Con las listas de candidatos ya construidas cuesta O(n*k*log(n*k)),
+    mas O(r^2) para las r ciudades impares que no se aparean por aristas
+    candidatas.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un problema del viajante
+
+    Retorno:
+    =======
+    state: State
+        un estado del TSP
+    """
+    n, dist = problem.n, problem.dist
+    neighbors = _neighbors(problem)
+
+    # aristas candidatas sin repetir, de menor a mayor largo
+    u = np.repeat(np.arange(n), neighbors.shape[1])
+    v = neighbors.ravel()
+    codes = np.unique(np.minimum(u, v) * n + np.maximum(u, v))
+    u, v = codes // n, codes % n
+    edges = np.stack((u, v), axis=1)[np.argsort(dist[u, v], kind="stable")]
+
+    # arbol generador minimo (Kruskal sobre los candidatos)
+    adj = [[] for _ in range(n)]
+    parent = list(range(n))
+
+    def find(a):
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    links = 0
+    for a, b in edges.tolist():
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[ra] = rb
+            adj[a].append(b)
+            adj[b].append(a)
+            links += 1
+            if links == n - 1:
+                break
+    if links < n - 1:
+        adj = _dense_mst(problem)  # los candidatos no conectan el grafo
+
+    # apareamiento goloso de las ciudades de grado impar
+    odd = np.array([c for c in range(n) if len(adj[c]) % 2], dtype=np.intp)
+    free = np.zeros(n, dtype=bool)
+    free[odd] = True
+    for a, b in edges[free[edges[:, 0]] & free[edges[:, 1]]].tolist():
+        if free[a] and free[b]:
+            free[a] = free[b] = False
+            adj[a].append(b)
+            adj[b].append(a)
+    odd = odd[free[odd]]
+    free = np.ones(len(odd), dtype=bool)
+    for idx in range(len(odd)):
+        if not free[idx]:
+            continue
+        free[idx] = False
+        rest = np.flatnonzero(free)
+        mate = rest[np.argmin(dist[odd[idx], odd[rest]])]
+        free[mate] = False
+        adj[odd[idx]].append(int(odd[mate]))
+        adj[int(odd[mate])].append(int(odd[idx]))
+
+    # recorrido euleriano (Hierholzer) y atajos
+    stack, circuit = [0], []
+    while stack:
+        city = stack[-1]
+        if adj[city]:
+            nxt = adj[city].pop()
+            adj[nxt].remove(city)
+            stack.append(nxt)
+        else:
+            circuit.append(stack.pop())
+    seen = np.zeros(n, dtype=bool)
+    order = []
+    for city in circuit:
+        if not seen[city]:
+            seen[city] = True
+            order.append(city)
+    return _close(order)
+
+
+def coord_array(coords: dict[int, tuple[float, float]] | np.ndarray
+                ) -> np.ndarray:
+    """Convierte las coordenadas a una matriz de n x 2.
+
+    Argumentos:
+    ==========
+    coords: dict[int, tuple[float, float]] | np.ndarray
+        diccionario con las coordenadas de las ciudades 1 a n,
+        o matriz de n x 2 con las de las ciudades 0 a n-1
+    """
+    if isinstance(coords, dict):
+        return np.array([coords[i] for i in sorted(coords)], dtype=np.float64)
+    return np.asarray(coords, dtype=np.float64)
+
+
+def _neighbors(problem: TSP) -> np.ndarray:
+    """Listas de candidatos del problema, o las de los K mas cercanos."""
+    if problem.neighbors is not None:
+        return problem.neighbors
+    return nearest_neighbors(problem.dist, K)
+
+
+def _dense_mst(problem: TSP) -> list[list[int]]:
+    """Arbol generador minimo con Prim sobre la matriz completa, en O(n^2).
+
+    Devuelve las listas de adyacencia del arbol.
+    """
+    n, dist = problem.n, problem.dist
+    adj = [[] for _ in range(n)]
+    best = np.array(dist[0], dtype=np.float64)
+    link = np.zeros(n, dtype=np.intp)
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = True
+    best[0] = np.inf
+    for _ in range(n - 1):
+        city = int(np.argmin(np.where(in_tree, np.inf, best)))
+        in_tree[city] = True
+        adj[city].append(int(link[city]))
+        adj[int(link[city])].append(city)
+        row = dist[city]
+        closer = ~in_tree & (row < best)
+        best[closer] = row[closer]
+        link[closer] = city
+    return adj
+
+
+def _close(order: list[int]) -> State:
+    """Rota un recorrido para que empiece en 0 y lo cierra."""
+    start = order.index(0)
+    order = order[start:] + order[:start]
+    order.append(0)
+    return order
+
+
+def _hilbert_index(x: np.ndarray, y: np.ndarray, bits: int) -> np.ndarray:
+    """Indice sobre la curva de Hilbert de cada punto (x, y) de la grilla."""
+    x, y = x.copy(), y.copy()
+    index = np.zeros(len(x), dtype=np.int64)
+    s = 1 << (bits - 1)
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        index += s * s * ((3 * rx) ^ ry)
+        # rotar el cuadrante
+        flip = ~ry
+        swap_x = flip & rx
+        x[swap_x] = s - 1 - x[swap_x]
+        y[swap_x] = s - 1 - y[swap_x]
+        x[flip], y[flip] = y[flip], x[flip].copy()
+        s >>= 1
+    return index
@@ -0,0 +1,421 @@
+"""Este modulo define la clase TwoOptTable.
+
+TwoOptTable guarda la diferencia de valor objetivo de cada accion 2-opt de un
+recorrido y la mantiene entre iteraciones. Un movimiento 2-opt solo cambia
+las aristas de las ciudades del tramo invertido y de sus extremos, por lo que
+despues de aplicarlo solo se recalculan las entradas de la tabla que
+involucran a esas ciudades, en lugar de todo el vecindario.
+
+Las entradas se indexan por ciudades y no por posiciones, pues al invertir un
+tramo cambian las posiciones de todas sus ciudades pero no las de las demas:
+
+* (0, a, b): quitar las aristas (a, succ(a)) y (b, succ(b)) y agregar
+(a, b) y (succ(a), succ(b)).
+* (1, a, b): quitar las aristas (pred(a), a) y (pred(b), b) y agregar
+(a, b) y (pred(a), pred(b)). Solo se usan con listas de candidatos.
+
+Sin listas de candidatos basta con la primera forma, que es simetrica en a y
+b, por lo que solo se guardan las entradas con a < b. Con listas de
+candidatos, b recorre los vecinos cercanos de a y se usan ambas formas, lo
+que da el mismo vecindario que TSP.action_array.
+
+Las entradas se guardan en un vector, agrupadas por la ciudad a en filas
+contiguas: la fila a tiene las entradas (0, a, b) con b > a sin listas de
+candidatos, y las 2*k entradas (f, a, cand[a, c]) con ellas. Ademas se
+guarda el valor y la posicion de la mejor entrada de cada fila, por lo que
+buscar la mejor accion cuesta O(n), y al aplicar una accion solo se
+recorren de nuevo las filas de las ciudades que cambiaron y aquellas cuyo
+maximo se recalculo y bajo.
+"""
+
+from __future__ import annotations
+from random import Random
+from problem import TSP
+from node import Action
+from tour import Tour
+import numpy as np
+
+# Cantidad aproximada de entradas que se evaluan juntas al construir la tabla
+BLOCK = 1 << 20
+
+
+class TwoOptTable:
+    """Clase que mantiene las diferencias de las acciones 2-opt."""
+
+    def __init__(self, problem: TSP, tour: Tour) -> None:
+        """Construye una instancia de la clase y evalua todo el vecindario.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            un problema del viajante
+        tour: Tour
+            recorrido actual, que self.apply modifica en el lugar
+        """
+        n = problem.n
+        self.n = n
+        self.dist = problem.dist
+        self.tour = tour
+        self.cand = problem.neighbors
+        if self.cand is None:
+            forms = 1
+            lens = np.arange(n - 1, -1, -1)  # entradas (a, b) con b > a
+        else:
+            forms, width = 2, self.cand.shape[1]
+            lens = np.full(n, forms * width)
+            # entradas (a, c) de cada ciudad b = cand[a, c], agrupadas por b
+            self._by_city = np.argsort(self.cand, axis=None, kind="stable")
+            self._starts = np.searchsorted(self.cand.ravel()[self._by_city],
+                                           np.arange(n + 1))
+        # inicio de la fila de cada ciudad en self.diff
+        self._row = np.concatenate(([0], np.cumsum(lens)))
+
+        # ciudad siguiente y largo de la arista en cada sentido
+        self._next = np.empty((forms, n), dtype=np.intp)
+        self._len = np.empty((forms, n), dtype=np.float64)
+        self._edges(np.arange(n))
+
+        # mejor entrada de cada fila, -inf y -1 si no tiene entradas validas
+        self.diff = np.empty(self._row[-1], dtype=np.float64)
+        self._rowbest = np.empty(n, dtype=np.float64)
+        self._rowarg = np.empty(n, dtype=np.intp)
+        for rows in np.array_split(np.arange(n), max(1, len(self) // BLOCK)):
+            if not len(rows):
+                continue
+            if self.cand is None:
+                # las entradas validas de la grilla, fila a fila, son las
+                # de las filas rows, contiguas en self.diff
+                a, b = rows[:, None], np.arange(n)[None, :]
+                upper = b > a
+                values = np.where(upper, self._values(0, a, b), -np.inf)
+                self.diff[self._row[rows[0]]:self._row[rows[-1] + 1]] = \
+                    values[np.broadcast_to(upper, values.shape)]
+                self._best_of(rows, values, axis=1)
+            else:
+                idx = self._entries(rows)
+                self._refresh(idx)
+                self._rowbest[rows], self._rowarg[rows] = self._scan(rows)
+        self.nevals = len(self)
+
+    def __len__(self) -> int:
+        """Cantidad de entradas de la tabla."""
+        return self.diff.size
+
+    def action(self, k: int) -> Action:
+        """Accion 2-opt (i, j) sobre las posiciones de la k-esima entrada."""
+        f, a, b = self._decode(np.intp(k))
+        pos = self.tour.pos
+        p, q = (int(pos[a]) - f) % self.n, (int(pos[b]) - f) % self.n
+        return min(p, q), max(p, q)
+
+    def adding(self, edges: np.ndarray) -> np.ndarray:
+        """Determina las entradas que agregan alguna de las aristas dadas.
+
+        Cuesta O(len(edges)) sin listas de candidatos y O(k*len(edges))
+        con ellas, sin recorrer la tabla.
+
+        Argumentos:
+        ==========
+        edges: np.ndarray
+            aristas codificadas como en move_edges
+
+        Retorno:
+        =======
+        idx: np.ndarray
+            indices de las entradas en self.diff, posiblemente repetidos
+        """
+        n, tour = self.n, self.tour
+        u, v = np.divmod(np.asarray(edges, dtype=np.intp), n)
+        if self.cand is None:
+            # la entrada (a, b) agrega (a, b) y (succ(a), succ(b))
+            pu, pv = tour.order[tour.pos[u] - 1], tour.order[tour.pos[v] - 1]
+            return np.concatenate((self._pair(u, v), self._pair(pu, pv)))
+        u, v = np.concatenate((u, v)), np.concatenate((v, u))
+        found = []
+        for f in range(2):
+            # la entrada (f, u, v) agrega la arista (u, v)
+            found.append(self._find(f, u, v))
+            # la entrada (f, a, b) agrega la arista (next(a), next(b))
+            a = tour.order[(tour.pos[u] - 1 + 2 * f) % n]
+            b = tour.order[(tour.pos[v] - 1 + 2 * f) % n]
+            found.append(self._find(f, a, b))
+        return np.concatenate(found)
+
+    def best_move(self, rng: Random | None = None
+                  ) -> tuple[Action | None, float]:
+        """Determina la accion con mayor diferencia de valor objetivo.
+
+        Argumentos:
+        ==========
+        rng: Random | None
+            generador con el que se desempata, None para tomar la primera
+
+        Retorno:
+        =======
+        action: Action | None
+            la mejor accion, None si no hay acciones validas
+        diff: float
+            su diferencia de valor objetivo
+        """
+        best = self._rowbest.max()
+        if best == -np.inf:
+            return None, 0.0
+        rows = np.flatnonzero(self._rowbest == best)
+        a = rows[0] if rng is None else rng.choice(rows)
+        idx = np.arange(self._row[a], self._row[a + 1])
+        ties = idx[self.diff[idx] == best]
+        k = ties[0] if rng is None else rng.choice(ties)
+        return self.action(k), float(best)
+
+    def row_maxima(self, blocked: np.ndarray | None = None
+                   ) -> tuple[np.ndarray, np.ndarray]:
+        """Mejor entrada de cada fila, sin contar las entradas bloqueadas.
+
+        Solo se recorren las filas cuya mejor entrada esta bloqueada.
+
+        Argumentos:
+        ==========
+        blocked: np.ndarray | None
+            indices de entradas que no se pueden elegir
+
+        Retorno:
+        =======
+        best: np.ndarray
+            valor de la mejor entrada de cada fila, -inf si no hay
+        arg: np.ndarray
+            indice de esa entrada en self.diff
+        """
+        best, arg = self._rowbest.copy(), self._rowarg.copy()
+        if blocked is not None and len(blocked):
+            rows = np.flatnonzero(np.isin(arg, blocked))
+            if len(rows):
+                best[rows], arg[rows] = self._scan(rows, blocked)
+        return best, arg
+
+    def apply(self, action: Action) -> int:
+        """Aplica una accion 2-opt al recorrido y actualiza la tabla.
+
+        Argumentos:
+        ==========
+        action: Action
+            una accion 2-opt (i, j) sobre las posiciones del recorrido
+
+        Retorno:
+        =======
+        evals: int
+            cantidad de entradas recalculadas
+        """
+        n, order = self.n, self.tour.order
+        i, j = action
+        # Tour.reverse invierte el tramo i+1..j o su complemento, el mas corto
+        if 2 * (j - i) > n:
+            idx = (j + 1 + np.arange(n - (j - i))) % n
+        else:
+            idx = np.arange(i + 1, j + 1)
+        ends = order[[i, i + 1, j, (j + 1) % n]]
+        cities = np.unique(np.concatenate((order[idx], ends)))
+        self.tour.move(action)
+        self._edges(cities)
+
+        if self.cand is None:
+            # las entradas que involucran a las ciudades que cambiaron son
+            # los pares {a, c} con c en cities, y como la primera forma es
+            # simetrica se evaluan todos en una unica grilla de n x m
+            a, c = np.arange(n)[:, None], cities[None, :]
+            values, idx = self._grid(cities)
+            self.diff[idx] = values
+            evals = (n - 1) * len(cities)
+            # filas de las ciudades que cambiaron: entradas (c, a) con a > c
+            self._best_of(cities, np.where(a > c, values, -np.inf), axis=0)
+            # demas filas: entradas (a, c) con a < c
+            lower = np.where(a < c, values, -np.inf)
+            col = lower.argmax(axis=1)
+            after = lower[np.arange(n), col]
+            changed = np.zeros(n, dtype=bool)
+            changed[cities] = True
+            # solo se recorren las filas cuyo maximo estaba en las columnas
+            # recalculadas y bajo; en las demas basta con comparar
+            arg = self._rowarg
+            _, _, old = self._decode(np.maximum(arg, 0))
+            lost = ~changed & (arg >= 0) & changed[old] \
+                & (after < self._rowbest)
+            up = ~changed & (after >= self._rowbest) & (after > -np.inf)
+            self._rowbest[up] = after[up]
+            self._rowarg[up] = self._pair(np.flatnonzero(up), cities[col[up]])
+            rows = np.flatnonzero(lost)
+        else:
+            # filas de las ciudades que cambiaron
+            idx = self._entries(cities)
+            self._refresh(idx)
+            evals = len(idx)
+            # entradas de las demas filas cuya ciudad b cambio
+            width = self.cand.shape[1]
+            counts = self._starts[cities + 1] - self._starts[cities]
+            first = np.repeat(self._starts[cities] - np.cumsum(counts)
+                              + counts, counts) + np.arange(counts.sum())
+            a, c = np.divmod(self._by_city[first], width)
+            idx = np.concatenate((a * 2 * width + c,
+                                  a * 2 * width + width + c))
+            self._refresh(idx)
+            rows = np.union1d(cities, a)
+            evals += len(idx)
+        self._rowbest[rows], self._rowarg[rows] = self._scan(rows)
+        self.nevals += evals
+        return evals
+
+    def _best_of(self, rows: np.ndarray, values: np.ndarray,
+                 axis: int) -> None:
+        """Guarda la mejor entrada de filas evaluadas como grilla, sin
+        candidatos.
+
+        values[., r] (axis=0) o values[r, .] (axis=1) tiene las entradas
+        (rows[r], b) para cada ciudad b, con -inf en las que no se guardan.
+        """
+        col = values.argmax(axis=axis)
+        best = np.take_along_axis(values, np.expand_dims(col, axis),
+                                  axis=axis).squeeze(axis)
+        self._rowbest[rows] = best
+        self._rowarg[rows] = np.where(best > -np.inf,
+                                      self._pair(rows, col), -1)
+
+    def _grid(self, cities: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Evalua los pares {a, c} de todas las ciudades a con c en cities,
+        sin candidatos.
+
+        Usa que las distancias son simetricas para leer la matriz por filas.
+
+        Retorno:
+        =======
+        values: np.ndarray
+            matriz de n x m con la diferencia de cada par, -inf si es
+            invalido
+        idx: np.ndarray
+            matriz de n x m con el indice de cada par en self.diff; en la
+            diagonal a == c, que no es un par, se repiten el indice y el
+            valor de otro par de la columna
+        """
+        n, m = self.n, len(cities)
+        nxt, length = self._next[0], self._len[0]
+        cols = np.arange(m)
+        # mismo orden de operaciones que self._values
+        values = length[:, None] + length[cities]
+        values -= self.dist[cities].T
+        values -= self.dist[nxt[cities]][:, nxt].T
+        # pares invalidos: a == c, a == pred(c) y a == succ(c)
+        pred = np.empty(n, dtype=np.intp)
+        pred[nxt] = np.arange(n)
+        values[cities, cols] = -np.inf
+        values[pred[cities], cols] = -np.inf
+        values[nxt[cities], cols] = -np.inf
+
+        a, c = np.arange(n)[:, None], cities[None, :]
+        base = self._row[:-1] - np.arange(n) - 1
+        idx = np.where(a < c, base[:, None] + c, base[cities] + a)
+        # la diagonal no es una entrada: se escribe sobre un par valido
+        other = np.where(cities < n - 1, cities + 1, cities - 1)
+        idx[cities, cols] = idx[other, cols]
+        values[cities, cols] = values[other, cols]
+        return values, idx
+
+    def _decode(self, idx: np.ndarray
+                ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Forma f y ciudades a y b de las entradas dadas."""
+        if self.cand is None:
+            a = np.searchsorted(self._row, idx, side="right") - 1
+            return 0, a, a + 1 + (idx - self._row[a])
+        width = self.cand.shape[1]
+        a, rest = np.divmod(idx, 2 * width)
+        f, c = np.divmod(rest, width)
+        return f, a, self.cand[a, c]
+
+    def _entries(self, rows: np.ndarray) -> np.ndarray:
+        """Indices de todas las entradas de las filas dadas, fila a fila."""
+        starts = self._row[rows]
+        lens = self._row[rows + 1] - starts
+        return np.repeat(starts - np.cumsum(lens) + lens, lens) \
+            + np.arange(lens.sum())
+
+    def _pair(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Indice de la entrada (0, a, b), o (0, b, a), sin candidatos."""
+        a, b = np.minimum(a, b), np.maximum(a, b)
+        return self._row[a] + b - a - 1
+
+    def _find(self, f: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Indices de las entradas (f, a, b) que estan en la tabla."""
+        width = self.cand.shape[1]
+        rows, c = np.nonzero(self.cand[a] == b[:, None])
+        return a[rows] * 2 * width + f * width + c
+
+    def _edges(self, cities: np.ndarray) -> None:
+        """Actualiza las ciudades vecinas y el largo de sus aristas."""
+        tour, n = self.tour, self.n
+        pos = tour.pos[cities]
+        for f in range(self._next.shape[0]):
+            nxt = tour.order[(pos + 1 - 2 * f) % n]
+            self._next[f, cities] = nxt
+            self._len[f, cities] = self.dist[cities, nxt]
+
+    def _refresh(self, idx: np.ndarray) -> None:
+        """Recalcula las entradas dadas."""
+        self.diff[idx] = self._values(*self._decode(idx))
+
+    def _values(self, f: np.ndarray, a: np.ndarray, b: np.ndarray
+                ) -> np.ndarray:
+        """Diferencias de las entradas (f, a, b), dadas como arreglos
+        compatibles.
+
+        Las entradas de acciones invalidas (aristas adyacentes) valen -inf.
+        """
+        na, nb = self._next[f, a], self._next[f, b]
+        diff = (self._len[f, a] + self._len[f, b] - self.dist[a, b]
+                - self.dist[na, nb])
+        return np.where((a == b) | (b == na) | (a == nb), -np.inf, diff)
+
+    def _scan(self, rows: np.ndarray, blocked: np.ndarray | None = None
+              ) -> tuple[np.ndarray, np.ndarray]:
+        """Recorre las filas dadas y devuelve su mejor entrada.
+
+        Argumentos:
+        ==========
+        rows: np.ndarray
+            ciudades de las filas, sin repetir
+        blocked: np.ndarray | None
+            indices de entradas que no se cuentan
+
+        Retorno:
+        =======
+        best: np.ndarray
+            valor de la mejor entrada de cada fila, -inf si no hay
+        arg: np.ndarray
+            indice de esa entrada, -1 si la fila no tiene entradas validas
+        """
+        if self.cand is not None:
+            # todas las filas tienen 2*k entradas
+            width = 2 * self.cand.shape[1]
+            values = self.diff.reshape(self.n, width)[rows]
+            if blocked is not None:
+                idx = rows[:, None] * width + np.arange(width)
+                values[np.isin(idx, blocked)] = -np.inf
+            col = values.argmax(axis=1)
+            best = values[np.arange(len(rows)), col]
+            return best, np.where(best > -np.inf, rows * width + col, -1)
+        idx = self._entries(rows)
+        values = self.diff[idx]
+        if blocked is not None:
+            values = np.where(np.isin(idx, blocked), -np.inf, values)
+        lens = self._row[rows + 1] - self._row[rows]
+        best = np.full(len(rows), -np.inf)
+        arg = np.full(len(rows), -1, dtype=np.intp)
+        full = lens > 0
+        if not len(values):
+            return best, arg
+        starts = (np.cumsum(lens) - lens)[full]
+        best[full] = np.maximum.reduceat(values, starts)
+        # primera entrada de cada fila que alcanza su maximo
+        seg = np.repeat(np.arange(len(rows)), lens)
+        hits = np.where((values == best[seg]) & (values > -np.inf),
+                        np.arange(len(values)), len(values))
+        first = np.minimum.reduceat(hits, starts)
+        valid = first < len(values)
+        arg[np.flatnonzero(full)[valid]] = idx[first[valid]]
+        return best, arg
@@ -0,0 +1,260 @@
+"""Este modulo define la clase CoordDistances.
+
+CoordDistances es una matriz de distancias implicita: en lugar de guardar
+las n^2 distancias, guarda solo las coordenadas de las ciudades y calcula
+las distancias a pedido, de forma vectorizada, segun las reglas de TSPLIB.
+Asi se pueden cargar instancias de decenas de miles de ciudades, cuya matriz
+densa no entra en memoria.
+
+* EUC_2D: distancia euclidea redondeada al entero mas cercano (nint).
+* CEIL_2D: distancia euclidea redondeada hacia arriba.
+* ATT: distancia pseudo-euclidea de los problemas att.
+* GEO: distancia geografica, con coordenadas en grados y minutos.
+
+Se indexa igual que una matriz de NumPy de n x n: dist[a, b] con enteros o
+arreglos de ciudades, y dist[c] o dist[filas] para filas completas. Las
+ultimas filas pedidas se guardan en un cache LRU, pues las heuristicas
+suelen consultar repetidamente las mismas ciudades.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+import math
+import numpy as np
+
+# Tipos de distancia soportados
+EUC_2D = "EUC_2D"
+CEIL_2D = "CEIL_2D"
+ATT = "ATT"
+GEO = "GEO"
+METRICS = (EUC_2D, CEIL_2D, ATT, GEO)
+
+# Radio de la Tierra de TSPLIB, en km
+RADIUS = 6378.388
+
+
+class CoordDistances:
+    """Clase que representa una matriz de distancias calculada a pedido."""
+
+    ndim = 2
+    dtype = np.dtype(np.float64)
+
+    def __init__(self, coords: np.ndarray, metric: str = EUC_2D,
+                 cache: int = 256) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        coords: np.ndarray
+            matriz de n x 2 con las coordenadas de las ciudades 0 a n-1
+        metric: str
+            tipo de distancia, uno de METRICS
+        cache: int
+            cantidad de filas a guardar en el cache
+        """
+        if metric not in METRICS:
+            raise ValueError("Unsupported distance type: {}".format(metric))
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64)
+        self.metric = metric
+        self.cache = cache
+        self._rows = OrderedDict()
+        if metric == GEO:
+            # latitud y longitud en radianes, como en tsplib95
+            degrees = np.trunc(self.coords)
+            self._geo = np.radians(degrees + (self.coords - degrees) * 5 / 3)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Dimensiones de la matriz."""
+        return len(self.coords), len(self.coords)
+
+    def __len__(self) -> int:
+        """Cantidad de ciudades."""
+        return len(self.coords)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """Matriz densa completa, calculada por bloques de filas.
+
+        Solo tiene sentido para instancias que entran en memoria.
+        """
+        n = len(self)
+        full = np.empty((n, n), dtype=np.float64 if dtype is None else dtype)
+        chunk = max(1, (1 << 22) // max(n, 1))
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            full[start:stop] = self[np.arange(start, stop)]
+        return full
+
+    def __getstate__(self) -> dict:
+        """Estado para pickle, sin el cache de filas."""
+        state = self.__dict__.copy()
+        state['_rows'] = OrderedDict()
+        return state
+
+    def __getitem__(self, key):
+        """Distancias entre ciudades, con la misma semantica que NumPy.
+
+        Argumentos:
+        ==========
+        key: int | np.ndarray | tuple
+            una ciudad o arreglo de ciudades (filas completas), o un par
+            (a, b) de ciudades o arreglos de ciudades
+        """
+        if isinstance(key, tuple):
+            a, b = key
+            if isinstance(a, (int, np.integer)):
+                row = self._rows.get(int(a))
+                if row is not None:
+                    return row[b]
+                if isinstance(b, (int, np.integer)):
+                    return self.pair(int(a), int(b))
+            return self.between(np.asarray(a), np.asarray(b))
+        if isinstance(key, (int, np.integer)):
+            return self.row(int(key))
+        rows = np.arange(len(self))[key]
+        return self.between(rows[..., None], np.arange(len(self)))
+
+    def row(self, city: int) -> np.ndarray:
+        """Distancias de una ciudad a todas las demas, con cache LRU.
+
+        La fila devuelta es de solo lectura.
+        """
+        row = self._rows.get(city)
+        if row is not None:
+            self._rows.move_to_end(city)
+            return row
+        row = self.between(np.array(city), np.arange(len(self)))
+        row.flags.writeable = False
+        if self.cache > 0:
+            self._rows[city] = row
+            if len(self._rows) > self.cache:
+                self._rows.popitem(last=False)
+        return row
+
+    def pair(self, a: int, b: int) -> float:
+        """Distancia entre dos ciudades, sin pasar por NumPy."""
+        if a == b:
+            return 0.0
+        if self.metric == GEO:
+            (lat1, lng1), (lat2, lng2) = self._geo[a], self._geo[b]
+            q1 = math.cos(lng1 - lng2)
+            q2 = math.cos(lat1 - lat2)
+            q3 = math.cos(lat1 + lat2)
+            cos = min(1.0, 0.5 * ((1 + q1) * q2 - (1 - q1) * q3))
+            return float(int(RADIUS * math.acos(cos) + 1))
+        (x1, y1), (x2, y2) = self.coords[a], self.coords[b]
+        dx, dy = x1 - x2, y1 - y2
+        if self.metric == EUC_2D:
+            return float(int(math.sqrt(dx * dx + dy * dy) + 0.5))
+        if self.metric == CEIL_2D:
+            return float(math.ceil(math.sqrt(dx * dx + dy * dy)))
+        r = math.sqrt((dx * dx + dy * dy) / 10)
+        t = int(r + 0.5)
+        return float(t + 1 if t < r else t)
+
+    def nearest(self, k: int) -> np.ndarray:
+        """Determina los k vecinos mas cercanos de cada ciudad.
+
+        Las ciudades se reparten en una grilla y los vecinos de cada celda
+        se buscan en las celdas de alrededor, agrandando el cuadrado hasta
+        que ninguna ciudad fuera de el pueda estar mas cerca. Asi el costo
+        es O(n*k) en lugar de O(n^2). Solo sirve para las distancias
+        planas; para GEO se usa la busqueda por filas de la matriz.
+
+        Argumentos:
+        ==========
+        k: int
+            cantidad de vecinos de cada ciudad
+
+        Retorno:
+        =======
+        neighbors: np.ndarray
+            matriz de n x k, la fila c tiene los vecinos de la ciudad c
+            ordenados de mas cercano a mas lejano
+        """
+        n, xy = len(self), self.coords
+        k = max(0, min(k, n - 1))
+        neighbors = np.empty((n, k), dtype=np.intp)
+        if k == 0:
+            return neighbors
+
+        # grilla con unas k/2 ciudades por celda
+        side = max(1, int(math.sqrt(2 * n / max(k, 2))))
+        low = xy.min(axis=0)
+        size = max(float(np.ptp(xy, axis=0).max()), 1e-12) / side
+        cell = np.minimum(((xy - low) / size).astype(np.intp), side - 1)
+        code = cell[:, 0] * side + cell[:, 1]
+        order = np.argsort(code, kind="stable")
+        starts = np.searchsorted(code[order], np.arange(side * side + 1))
+
+        for c in np.flatnonzero(np.diff(starts)).tolist():
+            cx, cy = divmod(c, side)
+            members = order[starts[c]:starts[c + 1]]
+            r = 1
+            while len(members):
+                x0, x1 = max(cx - r, 0), min(cx + r, side - 1)
+                y0, y1 = max(cy - r, 0), min(cy + r, side - 1)
+                cand = np.concatenate([order[starts[x * side + y0]:
+                                             starts[x * side + y1 + 1]]
+                                       for x in range(x0, x1 + 1)])
+                if len(cand) > k:
+                    # distancia euclidea, que ordena igual que las de TSPLIB
+                    dx = xy[members, 0, None] - xy[cand, 0]
+                    dy = xy[members, 1, None] - xy[cand, 1]
+                    raw = np.sqrt(dx * dx + dy * dy)
+                    raw[members[:, None] == cand] = np.inf
+                    near = np.argpartition(raw, k - 1, axis=1)[:, :k]
+                    kth = np.take_along_axis(raw, near, axis=1).max(axis=1)
+                    # distancia de cada ciudad al borde del cuadrado, sin
+                    # contar los bordes de la grilla
+                    px, py = xy[members, 0], xy[members, 1]
+                    bound = np.full(len(members), np.inf)
+                    if x0 > 0:
+                        bound = np.minimum(bound, px - (low[0] + x0 * size))
+                    if x1 < side - 1:
+                        bound = np.minimum(bound,
+                                           low[0] + (x1 + 1) * size - px)
+                    if y0 > 0:
+                        bound = np.minimum(bound, py - (low[1] + y0 * size))
+                    if y1 < side - 1:
+                        bound = np.minimum(bound,
+                                           low[1] + (y1 + 1) * size - py)
+                    ok = kth <= bound
+                    if ok.any():
+                        idx = near[ok]
+                        near = cand[idx]
+                        # ordenar por distancia TSPLIB y, a igual
+                        # distancia, por distancia euclidea
+                        d = self.between(members[ok, None], near)
+                        e = raw[ok][np.arange(len(idx))[:, None], idx]
+                        rank = np.lexsort((e, d), axis=-1)
+                        neighbors[members[ok]] = np.take_along_axis(
+                            near, rank, axis=1)
+                    members = members[~ok]
+                r += 1
+        return neighbors
+
+    def between(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Distancias vectorizadas entre los arreglos de ciudades a y b.
+
+        Los arreglos se combinan con las reglas de broadcasting de NumPy.
+        """
+        if self.metric == GEO:
+            lat1, lng1 = self._geo[a, 0], self._geo[a, 1]
+            lat2, lng2 = self._geo[b, 0], self._geo[b, 1]
+            q1 = np.cos(lng1 - lng2)
+            q2 = np.cos(lat1 - lat2)
+            q3 = np.cos(lat1 + lat2)
+            cos = np.minimum(1.0, 0.5 * ((1 + q1) * q2 - (1 - q1) * q3))
+            d = np.trunc(RADIUS * np.arccos(cos) + 1)
+            return np.where(a == b, 0.0, d)
+        dx = self.coords[a, 0] - self.coords[b, 0]
+        dy = self.coords[a, 1] - self.coords[b, 1]
+        if self.metric == ATT:
+            r = np.sqrt((dx * dx + dy * dy) / 10)
+            t = np.trunc(r + 0.5)
+            return np.where(t < r, t + 1, t)
+        d = np.sqrt(dx * dx + dy * dy)
+        if self.metric == CEIL_2D:
+            return np.ceil(d)
+        return np.trunc(d + 0.5)
@@ -1,29 +1,274 @@
 """Este modulo se encarga de la lectura de archivos ".tsp".
 
-Requiere del paquete tsplib95.
+Los formatos mas comunes de TSPLIB se leen con un lector propio, que
+recorre el archivo una unica vez y convierte cada seccion directamente en
+arreglos de NumPy:
+
+* NODE_COORD_SECTION con distancias EUC_2D, CEIL_2D, ATT o GEO.
+* EDGE_WEIGHT_SECTION con distancias EXPLICIT en formato FULL_MATRIX,
+UPPER_ROW, LOWER_ROW, UPPER_DIAG_ROW o LOWER_DIAG_ROW.
+
+El resto de las variantes se leen con el paquete tsplib95, que construye un
+grafo completo de networkx.
+
+Ademas, la primera lectura guarda un cache en archivos ".npy", identificados
+por un hash del contenido del archivo y de la version del cache. Para las
+instancias definidas por coordenadas se guardan solo las coordenadas, y las
+lecturas siguientes reconstruyen la matriz por bloques de filas, pues su
+matriz densa puede ocupar gigabytes. Para las demas (EXPLICIT o leidas con
+tsplib95) se guarda la matriz de distancias, que las lecturas siguientes
+mapean en memoria (mmap) sin copiarla.
+
+Para instancias definidas por coordenadas (EUC_2D, CEIL_2D, ATT, GEO) se
+puede pedir una lectura perezosa, que no construye la matriz y devuelve una
+matriz implicita (distance.CoordDistances).
 """
 
 from __future__ import annotations
-from tsplib95 import load
-from networkx import Graph
+from hashlib import sha1
+from typing import TYPE_CHECKING
+from problem import graph_matrix
+from distance import CoordDistances, METRICS
+import numpy as np
+import os
+
+# tsplib95 y networkx solo se importan para los formatos sin lector propio
+if TYPE_CHECKING:
+    from networkx import Graph
+
+# Directorio del cache, relativo al directorio de cada instancia
+CACHE_DIR = ".tsp_cache"
 
+# Version del formato del cache, parte del nombre de sus archivos: al cambiar
+# el contenido o el tipo de los arreglos guardados se debe incrementar
+CACHE_VERSION = 2
 
-def read_tsp(filename: str) -> tuple[Graph, dict[int, tuple[int, int]]]:
+# Formatos de matrices explicitas soportados por el lector propio
+EXPLICIT_FORMATS = ("FULL_MATRIX", "UPPER_ROW", "LOWER_ROW",
+                    "UPPER_DIAG_ROW", "LOWER_DIAG_ROW")
+
+
+def read_tsp(filename: str, cache: bool = True, lazy: bool = False
+             ) -> tuple[Graph | np.ndarray | CoordDistances,
+                        dict[int, tuple[int, int]]]:
     """Lee un archivo en formato ".tsp".
 
     Argumentos:
     ==========
     filename: str
         ruta de la instancia
+    cache: bool
+        si es True, usa (y si hace falta crea) el cache de la instancia
+    lazy: bool
+        si es True y la instancia esta definida por coordenadas, no
+        construye la matriz de distancias
 
     Retorna:
     =======
-    G: Graph
-        grafo con los datos del TSP
+    G: Graph | np.ndarray | CoordDistances
+        matriz de distancias de la instancia (mapeada en memoria si se
+        guardo en el cache, ver el docstring del modulo), o bien una matriz implicita si la lectura es
+        perezosa, o bien el grafo de tsplib95 si el formato no esta
+        soportado por el lector propio
     coords: dict[int, tuple[int, int]]
         diccionario con las coordenadas de cada ciudad.
     """
+    if lazy:
+        metric = _header(filename).get("EDGE_WEIGHT_TYPE")
+        if metric in METRICS:
+            xy = _read_coords(filename, cache)
+            return CoordDistances(xy, metric), _coord_dict(xy)
+
+    if not cache:
+        return _read(filename)
+
+    paths = _cache_paths(filename)
+    metric = _header(filename).get("EDGE_WEIGHT_TYPE")
+    if metric in METRICS and os.path.exists(paths["coords"]):
+        # la matriz se reconstruye a partir de las coordenadas
+        xy = np.load(paths["coords"], mmap_mode="r")
+        return np.asarray(CoordDistances(xy, metric)), _coord_dict(xy)
+    if os.path.exists(paths["dist"]):
+        dist = np.load(paths["dist"], mmap_mode="r")
+        coords = {}
+        if os.path.exists(paths["coords"]):
+            coords = _coord_dict(np.load(paths["coords"], mmap_mode="r"))
+        return dist, coords
+
+    G, coords = _read(filename)
+    # el lector propio solo devuelve una matriz para estas metricas si
+    # leyo coordenadas 2D, con las que se puede reconstruir
+    rebuild = metric in METRICS and isinstance(G, np.ndarray)
+    try:
+        os.makedirs(os.path.dirname(paths["dist"]), exist_ok=True)
+        if coords and (rebuild or metric not in METRICS):
+            _save(paths["coords"],
+                  np.array([coords[i] for i in sorted(coords)],
+                           dtype=np.float64))
+        if not rebuild:
+            _save(paths["dist"],
+                  G if isinstance(G, np.ndarray) else graph_matrix(G))
+    except OSError:
+        pass  # sin permisos de escritura: se trabaja sin cache
+    return G, coords
+
+
+def parse_tsp(filename: str) -> tuple[dict[str, str], dict[str, np.ndarray]]:
+    """Lee un archivo de TSPLIB en una unica pasada.
+
+    Argumentos:
+    ==========
+    filename: str
+        ruta de la instancia
+
+    Retorno:
+    =======
+    header: dict[str, str]
+        especificaciones de la instancia (NAME, DIMENSION, etc.)
+    sections: dict[str, np.ndarray]
+        los numeros de cada seccion, en orden, como arreglo de floats
+    """
+    header, sections = {}, {}
+    current, chunks = None, []
+    with open(filename) as f:
+        for line in f:
+            text = line.strip()
+            if not text:
+                continue
+            if text[0].isalpha():
+                # una especificacion, el comienzo de una seccion o EOF
+                if current is not None:
+                    sections[current] = _numbers(chunks)
+                    current, chunks = None, []
+                key, _, value = text.partition(":")
+                key = key.strip().upper()
+                if key == "EOF":
+                    break
+                if key.endswith("SECTION"):
+                    current = key
+                else:
+                    header[key] = value.strip()
+            elif current is not None:
+                chunks.append(text)
+    if current is not None:
+        sections[current] = _numbers(chunks)
+    return header, sections
+
+
+def _read(filename: str
+          ) -> tuple[Graph | np.ndarray, dict[int, tuple[int, int]]]:
+    """Lee la instancia con el lector propio o, si no puede, con tsplib95."""
+    header, sections = parse_tsp(filename)
+    n = int(header.get("DIMENSION", 0))
+    kind = header.get("EDGE_WEIGHT_TYPE")
+    xy = _section_coords(sections.get("NODE_COORD_SECTION"), n)
+    if kind in METRICS and xy is not None:
+        return np.asarray(CoordDistances(xy, kind)), _coord_dict(xy)
+    fmt = header.get("EDGE_WEIGHT_FORMAT")
+    if kind == "EXPLICIT" and fmt in EXPLICIT_FORMATS \
+            and "EDGE_WEIGHT_SECTION" in sections:
+        dist = _explicit(sections["EDGE_WEIGHT_SECTION"], n, fmt)
+        if xy is None:
+            xy = _section_coords(sections.get("DISPLAY_DATA_SECTION"), n)
+        return dist, {} if xy is None else _coord_dict(xy)
+
+    from tsplib95 import load
     problem = load(filename)
     coords = problem.node_coords
     G = problem.get_graph()
     return G, coords
+
+
+def _read_coords(filename: str, cache: bool) -> np.ndarray:
+    """Lee solo las coordenadas de la instancia, usando el cache."""
+    path = _cache_paths(filename)["coords"] if cache else None
+    if path is not None and os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+    header, sections = parse_tsp(filename)
+    xy = _section_coords(sections.get("NODE_COORD_SECTION"),
+                         int(header.get("DIMENSION", 0)))
+    if xy is None:
+        raise ValueError("{} has no 2D node coordinates".format(filename))
+    if path is not None:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _save(path, xy)
+        except OSError:
+            pass
+    return xy
+
+
+def _header(filename: str) -> dict[str, str]:
+    """Lee las especificaciones de la instancia, hasta la primera seccion."""
+    header = {}
+    with open(filename) as f:
+        for line in f:
+            key, sep, value = line.partition(":")
+            key = key.strip().upper()
+            if not sep:
+                if key.endswith("SECTION") or key == "EOF":
+                    break
+                continue
+            header[key] = value.strip()
+    return header
+
+
+def _numbers(chunks: list[str]) -> np.ndarray:
+    """Convierte las lineas de una seccion en un arreglo de floats."""
+    return np.array(" ".join(chunks).split(), dtype=np.float64)
+
+
+def _section_coords(numbers: np.ndarray | None, n: int) -> np.ndarray | None:
+    """Coordenadas de una seccion de lineas "ciudad x y".
+
+    Devuelve None si no hay seccion o si las coordenadas no son 2D.
+    """
+    if numbers is None or n == 0 or len(numbers) != 3 * n:
+        return None
+    rows = numbers.reshape(n, 3)
+    xy = np.empty((n, 2), dtype=np.float64)
+    xy[rows[:, 0].astype(np.intp) - 1] = rows[:, 1:]  # ciudades 1..n
+    return xy
+
+
+def _explicit(weights: np.ndarray, n: int, fmt: str) -> np.ndarray:
+    """Arma la matriz de distancias de una seccion EDGE_WEIGHT_SECTION."""
+    if fmt == "FULL_MATRIX":
+        dist = weights[:n * n].reshape(n, n).copy()
+    else:
+        # las filas de la seccion recorren el triangulo fila por fila
+        rows, cols = {
+            "UPPER_ROW": lambda: np.triu_indices(n, 1),
+            "LOWER_ROW": lambda: np.tril_indices(n, -1),
+            "UPPER_DIAG_ROW": lambda: np.triu_indices(n),
+            "LOWER_DIAG_ROW": lambda: np.tril_indices(n),
+        }[fmt]()
+        dist = np.zeros((n, n), dtype=np.float64)
+        dist[rows, cols] = weights[:len(rows)]
+        dist[cols, rows] = weights[:len(rows)]
+    np.fill_diagonal(dist, 0)
+    return dist
+
+
+def _coord_dict(xy: np.ndarray) -> dict[int, tuple[float, float]]:
+    """Diccionario de coordenadas con las ciudades enumeradas de 1 a n."""
+    return {i + 1: tuple(c) for i, c in enumerate(xy.tolist())}
+
+
+def _cache_paths(filename: str) -> dict[str, str]:
+    """Rutas de los archivos del cache de una instancia."""
+    digest = sha1("tsp-cache-v{}:".format(CACHE_VERSION).encode())
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    base = os.path.join(os.path.dirname(os.path.abspath(filename)),
+                        CACHE_DIR, digest.hexdigest())
+    return {"coords": base + ".coords.npy", "dist": base + ".dist.npy"}
+
+
+def _save(path: str, array: np.ndarray) -> None:
+    """Guarda un arreglo de forma atomica, para no dejar archivos a medias."""
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
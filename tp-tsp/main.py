@@ -5,18 +5,14 @@ Fecha: 2023.
 Materia: Prog3 - TUIA
 """
 
+from random import Random
 import parse
 import load
 import search
-import plot
 import problem
-
-# Algoritmos involucrados
-HILL_CLIMBING = "hill"
-HILL_CLIMBING_RANDOM_RESET = "hill_r"
-TABU_SEARCH = "tabu"
-TABU_RESET = "tabu_r"
-ALGO_NAMES = [HILL_CLIMBING, HILL_CLIMBING_RANDOM_RESET, TABU_SEARCH, TABU_RESET]
+import construct
+import batch
+import bound
 
 
 def main() -> None:
@@ -24,23 +20,56 @@ def main() -> None:
     # Parsear los argumentos de la linea de comandos
     args = parse.parse()
 
+    # Modo por lotes: resolver cada instancia de un directorio
+    if args.instances is not None:
+        options = {"moves": args.moves, "neighbors": args.neighbors,
+                   "init": args.init, "time_limit": args.time_limit,
+                   "lazy": args.lazy, "cache": not args.no_cache,
+                   "bound": args.bound, "stop_gap": args.stop_gap}
+        batch.run(batch.instance_files(args.instances), args.algos,
+                  args.repeats, args.jobs, args.seed, args.output, options)
+        return
+
     # Leer la instancia
-    G, coords = load.read_tsp(args.filename)
+    G, coords = load.read_tsp(args.filename, cache=not args.no_cache,
+                              lazy=args.lazy)
     print(args.filename)
 
+    # Generador de semillas: el problema y cada algoritmo usan su propio
+    # generador, para que los resultados no dependan del orden de ejecucion
+    seeds = Random(args.seed)
+
     # Construir la instancia de TSP
-    p = problem.TSP(G)
-    p.random_reset()
+    p = problem.TSP(G, k=args.neighbors, rng=seeds.getrandbits(64))
+    if args.init in construct.CONSTRUCTION_NAMES:
+        p.init = construct.build(args.init, p, coords)
+    else:
+        p.random_reset()
     # queremos repetir el mismo estado inicial para todos los algoritmos.
     intial_state = list(p.init)
 
     # Construir las instancias de los algoritmos
-    algos = {
-        HILL_CLIMBING: search.HillClimbing(),
-        HILL_CLIMBING_RANDOM_RESET: search.HillClimbingReset(),
-        TABU_SEARCH: search.Tabu(),
-        TABU_RESET: search.TabuReset(),
-    }
+    algos = {name: search.make_search(name, args.moves,
+                                      seeds.getrandbits(64), args.jobs,
+                                      args.time_limit)
+             for name in args.algos}
+
+    # El algoritmo exacto solo admite instancias chicas
+    for name, algo in list(algos.items()):
+        if isinstance(algo, search.ExactHeldKarp) and not algo.fits(p.n):
+            print("Skipping {}: {} cities, at most {} supported".format(
+                name, p.n, algo.MAX_N))
+            del algos[name]
+
+    # Cota inferior del tour optimo, para medir la brecha de cada algoritmo
+    # y, si se pide, detenerlos al llegar a una brecha aceptable
+    lower = None
+    if args.bound or args.stop_gap is not None:
+        lower = bound.lower_bound(p, time_limit=args.time_limit)
+        print("Lower bound:", lower)
+        if args.stop_gap is not None:
+            for algo in algos.values():
+                algo.stop_within(lower, args.stop_gap)
 
     # Resolver el TSP con cada algoritmo
     for algo in algos.values():
@@ -51,17 +80,23 @@ def main() -> None:
         algo.solve(p)
 
     # Mostrar resultados por linea de comandos
-    print("Valor:", "Tiempo:", "Iters:", "Algoritmo:", sep="\t\t")
+    print("Valor:", "Tiempo:", "Iters:", "Gap:", "Algoritmo:", sep="\t\t")
     for name, algo in algos.items():
-        print(algo.value, "%.2f" % algo.time, algo.niters, name, sep="\t\t")
+        gap = "-" if lower is None else \
+            "%.2f%%" % (100 * bound.gap(algo.value, lower))
+        print(algo.value, "%.2f" % algo.time, algo.niters, gap, name,
+              sep="\t\t")
 
-    # Graficar los tours
+    # Graficar los tours, solo si se pide
+    if not args.plot and args.save_plot is None:
+        return
+    import plot
     tours = {}
     tours['init'] = (intial_state, p.obj_val(intial_state))  # estado inicial
 
     for name, algo in algos.items():
         tours[name] = (algo.tour, algo.value)
-    plot.show(G, coords, args.filename, tours)
+    plot.show(G, coords, args.filename, tours, args.save_plot, args.plot)
 
 
 if __name__ == "__main__":
@@ -2,16 +2,46 @@
 
 Node representa un nodo para una busqueda local, es decir,
 almacena un estado su un valor objetivo.
+
+Para poder guardar muchos nodos (conjuntos elite, reinicios, listas tabu de
+soluciones) los nodos usan __slots__ y guardan los recorridos como arreglos
+de NumPy de enteros sin signo de 16 o 32 bits. Ademas cada nodo tiene un hash
+al estilo Zobrist: el XOR de un hash de 64 bits por cada arista del
+recorrido. Asi dos recorridos que describen el mismo ciclo (aunque esten
+rotados o invertidos) tienen el mismo hash, y las comparaciones entre nodos
+distintos cuestan O(1).
+
+El hash se calcula la primera vez que se usa y no se actualiza. Las
+busquedas que mueven un Tour en el lugar (HillClimbing, Tabu,
+SimulatedAnnealing) no hashean ni comparan esos nodos; un nodo cuyo estado
+se modifica no debe usarse en conjuntos, diccionarios ni comparaciones.
 """
+
+from __future__ import annotations
+import numpy as np
+
 State = list[int]
-Action = tuple[int, int]
+Action = tuple[int, ...]
+
+# Constantes de splitmix64, para mezclar los codigos de las aristas
+_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
 
 class Node:
     """Clase que representa un nodo para busqueda local."""
 
+    __slots__ = ("state", "value", "_hash")
+
     def __init__(self, state: State, value: float) -> None:
         """Construye una instancia de la clase.
 
+        Las listas y arreglos se guardan como arreglos compactos. Otros
+        estados, como un Tour, se guardan tal cual para poder modificarlos
+        en el lugar, en cuyo caso el nodo no es hashable mientras se
+        modifica (ver el docstring del modulo).
+
         Argumentos:
         ==========
         state: State
@@ -19,17 +49,97 @@ class Node:
         value: float
             un valor objetivo
         """
+        if isinstance(state, (list, np.ndarray)):
+            state = compact(state)
         self.state = state
         self.value = value
+        self._hash = None  # se calcula la primera vez que se necesita
 
     def __repr__(self):
         """Representacion de nodos."""
         return "<Node {}>".format(self.state)
 
+    def __hash__(self):
+        """Hash del conjunto de aristas del recorrido."""
+        if self._hash is None:
+            self._hash = edge_hash(edge_codes(self.state))
+        return self._hash
+
     def __eq__(self, other):
-        """Nocion de igualdad nodos."""
-        return isinstance(other, Node) and self.state == other.state
+        """Nocion de igualdad nodos.
+
+        Dos nodos son iguales si sus recorridos tienen las mismas aristas.
+        Solo si los hashes coinciden se comparan las aristas.
+        """
+        if not isinstance(other, Node):
+            return False
+        if self is other:
+            return True
+        if hash(self) != hash(other):
+            return False
+        return np.array_equal(np.sort(edge_codes(self.state)),
+                              np.sort(edge_codes(other.state)))
 
     def __lt__(self, node):
-        """Nocion de comparacion de nodos."""
-        return self.state < node.state
+        """Nocion de comparacion de nodos.
+
+        Se ordena por valor objetivo y, a igual valor, por hash.
+        """
+        return (self.value, hash(self)) < (node.value, hash(node))
+
+
+def compact(state: State) -> np.ndarray:
+    """Guarda un estado en el tipo de entero sin signo mas chico posible.
+
+    Argumentos:
+    ==========
+    state: State
+        un estado
+
+    Retorno:
+    =======
+    state: np.ndarray
+        el estado como arreglo de uint16 o uint32
+    """
+    dtype = np.uint16 if len(state) <= np.iinfo(np.uint16).max else np.uint32
+    return np.asarray(state, dtype=dtype)
+
+
+def edge_codes(state: State) -> np.ndarray:
+    """Codigos min*n+max de las aristas de un recorrido cerrado.
+
+    Argumentos:
+    ==========
+    state: State
+        un estado, es decir, un recorrido cerrado [v_0,...,v_n-1,v_0]
+
+    Retorno:
+    =======
+    codes: np.ndarray
+        un arreglo de n codigos
+    """
+    tour = np.asarray(state).astype(np.int64)
+    n = len(tour) - 1
+    a, b = tour[:-1], tour[1:]
+    return np.minimum(a, b) * n + np.maximum(a, b)
+
+
+def edge_hash(codes: np.ndarray) -> int:
+    """XOR de los hashes de 64 bits (splitmix64) de un conjunto de aristas.
+
+    Argumentos:
+    ==========
+    codes: np.ndarray
+        codigos de las aristas
+
+    Retorno:
+    =======
+    hash: int
+        un entero de 64 bits
+    """
+    with np.errstate(over="ignore"):
+        z = np.asarray(codes, dtype=np.uint64).ravel() + _GAMMA
+        z = (z ^ (z >> np.uint64(30))) * _MIX1
+        z = (z ^ (z >> np.uint64(27))) * _MIX2
+        z ^= z >> np.uint64(31)
+    return int(np.bitwise_xor.reduce(z)) if len(z) else 0
@@ -1,6 +1,9 @@
 """Este modulo se encarga del parseo de la linea de comandos."""
 
 from argparse import ArgumentParser
+from problem import MOVES, TWO_OPT
+from construct import CONSTRUCTION_NAMES
+from search import ALGO_NAMES, DEFAULT_ALGOS
 
 
 def parse() -> ArgumentParser:
@@ -18,6 +21,88 @@ def parse() -> ArgumentParser:
     # Agregamos los argumentos posicionales
     parser.add_argument('filename',
                         metavar='filename.tsp',
+                        nargs='?',
                         help='path to input file')
 
-    return parser.parse_args()
+    # Agregamos los argumentos opcionales
+    parser.add_argument('-k', '--neighbors',
+                        type=int,
+                        default=None,
+                        help='restrict 2-opt moves to the k nearest \
+                              neighbours of each city')
+    parser.add_argument('-m', '--moves',
+                        nargs='+',
+                        choices=MOVES,
+                        default=[TWO_OPT],
+                        help='move families used by the local searches')
+    parser.add_argument('-j', '--jobs',
+                        type=int,
+                        default=1,
+                        help='number of processes for the random restarts, \
+                              or for the runs in batch mode')
+    parser.add_argument('-s', '--seed',
+                        type=int,
+                        default=None,
+                        help='seed for reproducible runs')
+    parser.add_argument('-t', '--time-limit',
+                        type=float,
+                        default=None,
+                        help='wall-clock budget in seconds for each algorithm')
+    parser.add_argument('-i', '--init',
+                        choices=['random'] + CONSTRUCTION_NAMES,
+                        default='random',
+                        help='heuristic used to build the initial tour')
+    parser.add_argument('--lazy',
+                        action='store_true',
+                        help='compute distances from the coordinates on \
+                              demand instead of building an n x n matrix')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='parse the instance file instead of using \
+                              the .npy cache in .tsp_cache/')
+    parser.add_argument('--plot',
+                        action='store_true',
+                        help='show the tours in a window')
+    parser.add_argument('--save-plot',
+                        metavar='FILE',
+                        default=None,
+                        help='save the tours to an image file, without a \
+                              display')
+    parser.add_argument('-b', '--bound',
+                        action='store_true',
+                        help='compute a Held-Karp lower bound and report the \
+                              gap of each algorithm')
+    parser.add_argument('-g', '--stop-gap',
+                        type=float,
+                        default=None,
+                        help='stop each algorithm once its tour is within \
+                              this relative gap of the lower bound \
+                              (e.g. 0.01); implies --bound')
+    parser.add_argument('-a', '--algos',
+                        type=lambda s: s.split(','),
+                        default=DEFAULT_ALGOS,
+                        help='comma separated algorithms to run, from: ' +
+                             ', '.join(ALGO_NAMES))
+
+    # Argumentos del modo por lotes
+    parser.add_argument('--instances',
+                        metavar='DIR',
+                        default=None,
+                        help='run in batch mode over every .tsp file in DIR')
+    parser.add_argument('-r', '--repeats',
+                        type=int,
+                        default=1,
+                        help='runs of each algorithm on each instance in \
+                              batch mode')
+    parser.add_argument('-o', '--output',
+                        default=None,
+                        help='batch results file, JSON lines if it ends in \
+                              .jsonl and CSV otherwise (default: stdout)')
+
+    args = parser.parse_args()
+    if (args.filename is None) == (args.instances is None):
+        parser.error('give either a filename or --instances')
+    unknown = set(args.algos) - set(ALGO_NAMES)
+    if unknown:
+        parser.error('unknown algorithms: ' + ', '.join(sorted(unknown)))
+    return args
@@ -1,30 +1,54 @@
 """Este modulo se encarga de graficar los tours.
 
 Requiere del paquete matplotlib.
+
+matplotlib y networkx se importan recien al graficar, pues demoran el
+arranque del programa. Si solo se guarda la grafica en un archivo se usa el
+backend Agg, que no necesita una pantalla.
 """
 
 from __future__ import annotations
-import matplotlib.pyplot as plt
-import networkx as nx
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 
 def show(G: nx.Graph,
          coords: dict[int, tuple[float, float]],
          name: str,
-         sols: dict[str, tuple[list[int]], float]) -> None:
+         sols: dict[str, tuple[list[int]], float],
+         filename: str | None = None,
+         display: bool = True) -> None:
     """Grafica un conjunto de tours.
 
     Argumentos:
     ==========
     G: nx.Graph
-        grafo que representa la instancia del TSP
+        grafo que representa la instancia del TSP (o su matriz de
+        distancias, en cuyo caso solo se usan las coordenadas)
     coords: dict[int, tuple[float, float]]
         diccionario con las coordenadas de cada ciudad
     name: str
         nombre de la instancia
     sols: dict[str, tuple[list[int]], float]
         diccionario con el tour y su costo para cada algoritmo de busqueda
+    filename: str | None
+        archivo donde guardar la grafica, None para no guardarla
+    display: bool
+        si es True, muestra la grafica en una ventana
     """
+    import matplotlib
+    if not display:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    # Si la instancia viene del cache no hay grafo, alcanza con los nodos
+    if not isinstance(G, nx.Graph):
+        G = nx.Graph()
+        G.add_nodes_from(coords)
+
     # Crear los subplots
     fig, axs = plt.subplots(nrows=1, ncols=len(sols), figsize=(10, 5))
 
@@ -48,7 +72,11 @@ def show(G: nx.Graph,
 
         axs[i].set_title("{}: {}".format(algo, val))
 
-    # Mostrar la grafica
+    # Guardar y mostrar la grafica
     fig.suptitle(name, fontsize=15)
     plt.subplots_adjust(hspace=0.5)
-    plt.show()
+    if filename is not None:
+        fig.savefig(filename)
+    if display:
+        plt.show()
+    plt.close(fig)
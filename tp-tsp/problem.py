@@ -24,11 +24,22 @@ Formulacion de estado completo para el Problema del Viajante:
     con 0 <= i < n-2, i+2 <= j < n.
     Notar que las aristas elegidas no deben ser adyacentes.
 
+    Opcionalmente se considera tambien la familia Or-opt, que consiste en
+    mover un tramo de 1 a 3 ciudades a otra posicion del tour, en su
+    sentido original o invertido (un caso particular de 3-opt).
+    Cada accion se representa como (i,j,k,r): mover el tramo
+    [v_i+1,...,v_j], con 1 <= j-i <= 3, entre v_k y v_k+1,
+    con k < i o j < k < n, invirtiendolo si r = 1.
+
 * Resultado.
     resultado([v_0,...,v_n], (i,j)) =
         [v_0,...,v_i] ++ [v_j,...,v_i+1] ++ [v_j+1,...,v_n]
     Notar que [v_j,...,v_i+1] es el reverso de [v_i+1,...,v_j]
 
+    resultado([v_0,...,v_n], (i,j,k,0)) =
+        [v_0,...,v_i] ++ [v_j+1,...,v_k] ++ [v_i+1,...,v_j] ++ [v_k+1,...,v_n]
+    si j < k, y analogamente si k < i.
+
 * Funcion objetivo:
     obj_val([v_0,v_1,...,v_n-1,v_n]) =
         - dist[v_0][v_1] - ... - dist[v_n-1][v_n]
@@ -37,9 +48,29 @@ Formulacion de estado completo para el Problema del Viajante:
 """
 
 from __future__ import annotations
-from networkx import Graph
-from random import shuffle
+from functools import lru_cache
+from numpy.typing import DTypeLike
+from typing import TYPE_CHECKING
+from random import Random
 from node import State, Action
+from distance import CoordDistances, GEO
+from tour import Tour
+import numpy as np
+
+# networkx se importa solo si hace falta, pues demora el arranque
+if TYPE_CHECKING:
+    from networkx import Graph
+
+# Familias de acciones
+TWO_OPT = "2opt"
+OR_OPT = "oropt"
+MOVES = [TWO_OPT, OR_OPT]
+
+# Largo maximo de los tramos que se mueven con Or-opt
+OR_OPT_LENGTH = 3
+
+# Cantidad de tamaños de instancia cuyas acciones se guardan en cache
+ACTION_CACHE = 4
 
 
 class OptProblem:
@@ -75,24 +106,86 @@ class TSP(OptProblem):
 
     Un estado es una lista de enteros: list[int].
     Una accion es un par de enteros: tuple[int,int].
+
+    Las distancias se guardan en una matriz densa de NumPy (self.dist),
+    construida una unica vez, y todas las evaluaciones leen de ella.
+    El grafo de networkx es solo una fuente opcional de datos. Para
+    instancias grandes, en lugar de la matriz se puede usar una matriz
+    implicita (distance.CoordDistances) que calcula las distancias a partir
+    de las coordenadas, sin ocupar memoria O(n^2).
+
+    Opcionalmente se pueden usar listas de candidatos: para cada ciudad se
+    guardan sus k vecinos mas cercanos (self.neighbors) y solo se consideran
+    las acciones 2-opt que agregan una arista entre una ciudad y alguno de
+    sus candidatos. Asi cada vecindario tiene O(n*k) acciones y no O(n^2).
     """
 
-    def __init__(self, G: Graph) -> None:
+    def __init__(self, G: Graph | np.ndarray | CoordDistances,
+                 dtype: DTypeLike = np.float64,
+                 k: int | None = None,
+                 rng: Random | np.random.Generator | int | None = None) -> None:
         """Construye una instancia de TSP.
 
         Argumentos:
         ==========
-        G: Graph
-            grafo con los datos del problema
+        G: Graph | np.ndarray | CoordDistances
+            grafo con los datos del problema, o bien matriz de distancias
+            de n x n (densa o implicita) con las ciudades enumeradas de
+            0 a n-1
             los nodos del grafo se enumeran de 1 a n, ¡cuidado!
+        dtype: DTypeLike
+            tipo de dato de la matriz de distancias
+            (por ejemplo np.float64, np.float32 o np.int32)
+        k: int | None
+            cantidad de vecinos cercanos de cada ciudad a considerar,
+            None para usar el vecindario 2-opt completo
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios (o semilla) de random_reset
         """
-        self.G = G
-        self.init = [i for i in range(0, G.number_of_nodes())]
+        self.rng = make_rng(rng)
+        if isinstance(G, CoordDistances):
+            self.G = None
+            self.dist = G
+        elif isinstance(G, np.ndarray):
+            self.G = None
+            self.dist = np.ascontiguousarray(G, dtype=dtype)
+        else:
+            self.G = G
+            self.dist = graph_matrix(G, dtype)
+        self.n = len(self.dist)
+        self.init = [i for i in range(0, self.n)]
         self.init.append(0)
+        self.build_candidates(k)
 
-    def actions(self, state: State) -> list[Action]:
+    def __getstate__(self) -> dict:
+        """Estado para pickle, sin el grafo de networkx.
+
+        Asi, al enviar el problema a otros procesos solo viaja la matriz
+        de distancias, que es lo unico que usan las evaluaciones.
+        """
+        state = self.__dict__.copy()
+        state['G'] = None
+        return state
+
+    def build_candidates(self, k: int | None) -> None:
+        """Construye (o descarta) las listas de candidatos de cada ciudad.
+
+        Argumentos:
+        ==========
+        k: int | None
+            cantidad de vecinos cercanos de cada ciudad,
+            None para volver al vecindario 2-opt completo
+        """
+        self.neighbors = None if k is None else nearest_neighbors(self.dist, k)
+
+    def actions(self, state: State) -> tuple[Action, ...]:
         """Determina la lista de acciones que se pueden aplicar a un estado.
 
+        Las acciones 2-opt no dependen del estado sino solo de la cantidad
+        de ciudades, por lo que se calculan una unica vez por tamaño y se
+        comparten entre todas las busquedas (ver two_opt_actions).
+        Si hay listas de candidatos, las acciones si dependen del estado.
+
         Argumentos:
         ==========
         state: list[int]
@@ -100,31 +193,104 @@ class TSP(OptProblem):
 
         Retorno:
         =======
-        act: list[tuple[int, int]]
-            lista de acciones
+        act: tuple[tuple[int, int], ...]
+            tupla inmutable de acciones
+        """
+        if self.neighbors is not None:
+            return tuple(map(tuple, self.action_array(state).tolist()))
+        return _two_opt_tuples(self.n)
+
+    def action_array(self, state: State, moves: str = TWO_OPT) -> np.ndarray:
+        """Determina las acciones que se pueden aplicar a un estado.
+
+        Misma informacion que self.actions, pero como matriz de NumPy
+        de solo lectura con una accion (i, j) por fila.
+
+        Argumentos:
+        ==========
+        state: list[int]
+            un estado
+        moves: str
+            familia de acciones, TWO_OPT u OR_OPT; en el segundo caso
+            cada fila es una accion (i, j, k, r)
         """
-        act = []
-        for i in range(0, self.G.number_of_nodes() - 2):
-            for j in range(i + 2, self.G.number_of_nodes()):
-                if (j + 1) % self.G.number_of_nodes() != i:
-                    act.append((i, j))
-        return act
-
-    def result(self, state: list[int], action: tuple[int, int]) -> list[int]:
+        if moves == OR_OPT:
+            if self.neighbors is None:
+                return or_opt_actions(self.n)
+            return self._or_opt_candidates(state)
+        if self.neighbors is None:
+            return two_opt_actions(self.n)
+
+        # Para cada ciudad a = tour[p] y candidato c = tour[q], la accion
+        # (p, q) agrega la arista (a, c) y la accion (p-1, q-1) agrega la
+        # arista (a, c) entre los sucesores de las aristas eliminadas.
+        n, k = self.n, self.neighbors.shape[1]
+        tour = np.asarray(state)[:-1]
+        pos = np.empty(n, dtype=np.intp)
+        pos[tour] = np.arange(n)
+        p = np.repeat(np.arange(n), k)
+        q = pos[self.neighbors[tour].ravel()]
+        p = np.concatenate((p, (p - 1) % n))
+        q = np.concatenate((q, (q - 1) % n))
+        i, j = np.minimum(p, q), np.maximum(p, q)
+        valid = (j - i >= 2) & ~((i == 0) & (j == n - 1))
+        codes = np.unique(i[valid] * n + j[valid])
+        return np.column_stack((codes // n, codes % n))
+
+    def _or_opt_candidates(self, state: State) -> np.ndarray:
+        """Acciones Or-opt que insertan un tramo junto a un candidato.
+
+        Para cada tramo, se prueba insertarlo junto a los vecinos cercanos
+        de sus extremos, en las dos aristas de cada vecino y en ambos
+        sentidos.
+        """
+        n, k = self.n, self.neighbors.shape[1]
+        tour = np.asarray(state)[:-1]
+        pos = np.empty(n, dtype=np.intp)
+        pos[tour] = np.arange(n)
+
+        # Tramos (i, j): todos los de largo 1 a OR_OPT_LENGTH
+        i, j = _or_opt_segments(n)
+
+        # Vecinos de los dos extremos de cada tramo
+        near = np.concatenate((self.neighbors[tour[i + 1]],
+                               self.neighbors[tour[j]]), axis=1)
+        q = pos[near].ravel()
+        i = np.repeat(i, 2 * k)
+        j = np.repeat(j, 2 * k)
+
+        # Insertar en la arista que sale o en la que entra al vecino
+        i, j = np.tile(i, 2), np.tile(j, 2)
+        q = np.concatenate((q, (q - 1) % n))
+        valid = (q < i) | (q > j)
+        i, j, q = i[valid], j[valid], q[valid]
+        codes = np.unique((i * n + j) * n + q)
+        i, j, q = codes // (n * n), codes // n % n, codes % n
+        r = np.zeros(len(codes), dtype=np.intp)
+        return np.column_stack((np.tile(i, 2), np.tile(j, 2),
+                                np.tile(q, 2), np.concatenate((r, r + 1))))
+
+    def result(self, state: list[int], action: Action) -> list[int]:
         """Determina el estado que resulta de aplicar una accion a un estado.
 
         Argumentos:
         ==========
         state: list[int]
             un estado
-        action: tuple[int, int]
-            una accion de self.acciones(state)
+        action: tuple[int, int] | tuple[int, int, int, int]
+            una accion de self.acciones(state), o una accion Or-opt
 
         Retorno:
         =======
         succ: list[int]
             estado sucesor
         """
+        if isinstance(state, Tour):
+            succ = state.copy()
+            succ.move(action)
+            return succ
+        if len(action) == 4:
+            return or_opt_result(state, action)
         succ = list(state)  # copy of the current state
         i, j = action
         succ[i + 1: j+1] = state[i + 1: j+1][::-1]  # reverse
@@ -143,12 +309,9 @@ class TSP(OptProblem):
         value: float
             valor objetivo
         """
-        value = 0
-        for i in range(0, self.G.number_of_nodes()):
-            u = state[i]+1  # origen
-            v = state[i+1]+1  # destino
-            value -= self.G.get_edge_data(u, v)['weight']
-        return value
+        tour = np.asarray(state)
+        # se suman las distancias en float64 para no desbordar enteros
+        return -float(self.dist[tour[:-1], tour[1:]].sum(dtype=np.float64))
 
     def val_diff(self, state: State) -> dict[Action, float]:
         """Determina la diferencia de valor objetivo al aplicar cada accion.
@@ -170,23 +333,362 @@ class TSP(OptProblem):
         diff: dict[tuple[int, int], float]
             diccionario con las diferencias de valor objetivo
         """
-        diff = {}
-        for a in self.actions(state):
-            i, j = a
-            v1 = state[i]+1  # origen de i
-            v2 = state[i+1]+1  # destino de i
-            v3 = state[j]+1  # origen de j
-            v4 = state[j+1]+1  # destino de j
-            distl1l2 = self.G.get_edge_data(v1, v2)['weight']
-            distl3l4 = self.G.get_edge_data(v3, v4)['weight']
-            distl1l3 = self.G.get_edge_data(v1, v3)['weight']
-            distl2l4 = self.G.get_edge_data(v2, v4)['weight']
-            diff[a] = distl1l2 + distl3l4 - distl1l3 - distl2l4
-        return diff
+        _, diff = self.val_diff_array(state)
+        return dict(zip(self.actions(state), diff.tolist()))
+
+    def val_diff_array(self, state: State,
+                       moves: str = TWO_OPT) -> tuple[np.ndarray, np.ndarray]:
+        """Version vectorizada de self.val_diff.
+
+        Calcula la diferencia de valor objetivo de todas las acciones
+        en una unica expresion de NumPy, sin construir un diccionario.
+
+        Argumentos:
+        ==========
+        state: list[int]
+            un estado
+        moves: str
+            familia de acciones, TWO_OPT u OR_OPT
+
+        Retorno:
+        =======
+        acts: np.ndarray
+            matriz de m x 2 con una accion (i, j) por fila
+            (m x 4 con una accion (i, j, k, r) por fila para OR_OPT)
+        diff: np.ndarray
+            vector de largo m con la diferencia de valor objetivo
+            de cada accion de acts
+        """
+        acts = self.action_array(state, moves)
+        if moves == OR_OPT:
+            return acts, self.or_opt_diff(state, acts)
+        return acts, self.two_opt_diff(state, acts[:, 0], acts[:, 1])
+
+    def two_opt_diff(self, state: State,
+                     i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """Determina la diferencia de valor objetivo de las acciones (i, j).
+
+        Argumentos:
+        ==========
+        state: list[int]
+            un estado
+        i, j: np.ndarray
+            vectores con las componentes de cada accion
+
+        Retorno:
+        =======
+        diff: np.ndarray
+            vector con la diferencia de valor objetivo de cada accion
+        """
+        tour = np.asarray(state)
+        v1 = tour[i]  # origen de i
+        v2 = tour[i+1]  # destino de i
+        v3 = tour[j]  # origen de j
+        v4 = tour[j+1]  # destino de j
+        dist = self.dist
+        diff = (dist[v1, v2] + dist[v3, v4] - dist[v1, v3] - dist[v2, v4])
+        return diff.astype(np.float64, copy=False)
+
+    def or_opt_diff(self, state: State, acts: np.ndarray) -> np.ndarray:
+        """Determina la diferencia de valor objetivo de acciones Or-opt.
+
+        Cada accion quita las aristas (v_i,v_i+1), (v_j,v_j+1) y
+        (v_k,v_k+1), y agrega (v_i,v_j+1) junto con (v_k,v_i+1) y
+        (v_j,v_k+1), o bien (v_k,v_j) y (v_i+1,v_k+1) si se invierte.
+
+        Argumentos:
+        ==========
+        state: list[int]
+            un estado
+        acts: np.ndarray
+            matriz con una accion (i, j, k, r) por fila
+
+        Retorno:
+        =======
+        diff: np.ndarray
+            vector con la diferencia de valor objetivo de cada accion
+        """
+        tour = np.asarray(state)
+        i, j, k, r = acts.T
+        p, s1 = tour[i], tour[i+1]  # antes del tramo y primera del tramo
+        s2, nx = tour[j], tour[j+1]  # ultima del tramo y despues del tramo
+        c, d = tour[k], tour[k+1]  # arista donde se inserta el tramo
+        rev = r.astype(bool)
+        a, b = np.where(rev, s2, s1), np.where(rev, s1, s2)
+        dist = self.dist
+        diff = (dist[p, s1] + dist[s2, nx] + dist[c, d]
+                - dist[p, nx] - dist[c, a] - dist[b, d])
+        return diff.astype(np.float64, copy=False)
+
+    def move_edges(self, state: State,
+                   acts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Determina las aristas que agrega y que quita cada accion.
+
+        Cada arista (u, v) se codifica como el entero min(u,v)*n + max(u,v),
+        que no depende de las posiciones ni del sentido del recorrido.
+
+        Argumentos:
+        ==========
+        state: list[int]
+            un estado
+        acts: np.ndarray
+            matriz de acciones 2-opt (m x 2) u Or-opt (m x 4)
+
+        Retorno:
+        =======
+        added: np.ndarray
+            matriz de m x e con las aristas que agrega cada accion
+        removed: np.ndarray
+            matriz de m x e con las aristas que quita cada accion
+            (e = 2 para 2-opt y e = 3 para Or-opt)
+        """
+        tour = np.asarray(state)
+        if acts.shape[1] == 2:
+            i, j = acts.T
+            v1, v2, v3, v4 = tour[i], tour[i+1], tour[j], tour[j+1]
+            added = [(v1, v3), (v2, v4)]
+            removed = [(v1, v2), (v3, v4)]
+        else:
+            i, j, k, r = acts.T
+            p, s1, s2, nx = tour[i], tour[i+1], tour[j], tour[j+1]
+            c, d = tour[k], tour[k+1]
+            rev = r.astype(bool)
+            a, b = np.where(rev, s2, s1), np.where(rev, s1, s2)
+            added = [(p, nx), (c, a), (b, d)]
+            removed = [(p, s1), (s2, nx), (c, d)]
+
+        def code(u, v):
+            return np.minimum(u, v) * self.n + np.maximum(u, v)
+
+        return (np.column_stack([code(u, v) for u, v in added]),
+                np.column_stack([code(u, v) for u, v in removed]))
 
     def random_reset(self) -> None:
         """Reinicia de forma aleatoria del estado inicial del TSP."""
-        self.init = [i for i in range(1, self.G.number_of_nodes())]
-        shuffle(self.init)  # mezclar la lista
+        self.init = [i for i in range(1, self.n)]
+        self.rng.shuffle(self.init)  # mezclar la lista
         self.init.append(0)  # agregar a 0 como inicio del tour
         self.init.insert(0, 0)  # agregar a 0 como fin del tour
+
+
+def graph_matrix(G: Graph, dtype: DTypeLike = np.float64) -> np.ndarray:
+    """Matriz de distancias densa de un grafo completo.
+
+    Los nodos 1..n del grafo pasan a ser las filas 0..n-1, y la diagonal
+    se anula (tsplib95 puede asignarle un peso a los lazos).
+
+    Argumentos:
+    ==========
+    G: Graph
+        grafo con los datos del problema
+    dtype: DTypeLike
+        tipo de dato de la matriz
+
+    Retorno:
+    =======
+    dist: np.ndarray
+        matriz de distancias de n x n
+    """
+    from networkx import to_numpy_array
+    dist = to_numpy_array(G, nodelist=sorted(G.nodes),
+                          weight='weight', dtype=dtype)
+    np.fill_diagonal(dist, 0)
+    return dist
+
+
+def make_rng(rng: Random | np.random.Generator | int | None = None) -> Random:
+    """Construye un generador de numeros aleatorios.
+
+    Argumentos:
+    ==========
+    rng: Random | np.random.Generator | int | None
+        un generador de Python (se usa tal cual), un generador de NumPy
+        (se toma de el una semilla), una semilla, o None para una
+        semilla aleatoria
+
+    Retorno:
+    =======
+    rng: Random
+        generador de numeros aleatorios
+    """
+    if isinstance(rng, Random):
+        return rng
+    if isinstance(rng, np.random.Generator):
+        return Random(int(rng.integers(2**63)))
+    return Random(rng)
+
+
+def nearest_neighbors(dist: np.ndarray | CoordDistances, k: int,
+                      chunk: int = 1024) -> np.ndarray:
+    """Determina los k vecinos mas cercanos de cada ciudad.
+
+    Se procesa la matriz de distancias por bloques de filas para no
+    duplicar en memoria una matriz de n x n. Los bloques se achican en
+    instancias grandes para no superar unas 2^24 distancias a la vez.
+    Con una matriz implicita de distancias planas se usa en cambio la
+    busqueda por grilla de CoordDistances.nearest.
+
+    Argumentos:
+    ==========
+    dist: np.ndarray | CoordDistances
+        matriz de distancias de n x n
+    k: int
+        cantidad de vecinos de cada ciudad
+    chunk: int
+        cantidad de filas procesadas a la vez
+
+    Retorno:
+    =======
+    neighbors: np.ndarray
+        matriz de n x k, la fila c tiene los vecinos de la ciudad c
+        ordenados de mas cercano a mas lejano
+    """
+    if isinstance(dist, CoordDistances) and dist.metric != GEO:
+        return dist.nearest(k)
+    n = len(dist)
+    k = max(0, min(k, n - 1))
+    neighbors = np.empty((n, k), dtype=np.intp)
+    if k == 0:
+        return neighbors
+    chunk = max(1, min(chunk, (1 << 24) // n))
+    for start in range(0, n, chunk):
+        rows = np.arange(start, min(start + chunk, n))
+        block = np.array(dist[rows], dtype=np.float64)
+        block[np.arange(len(rows)), rows] = np.inf  # excluir a la ciudad
+        near = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(block, near, axis=1), axis=1)
+        neighbors[rows] = np.take_along_axis(near, order, axis=1)
+    return neighbors
+
+
+@lru_cache(maxsize=ACTION_CACHE)
+def two_opt_actions(n: int) -> np.ndarray:
+    """Determina las acciones 2-opt de un TSP con n ciudades.
+
+    El resultado se guarda en cache (para los ultimos ACTION_CACHE
+    tamaños) y es de solo lectura, con indices de 32 bits.
+
+    Argumentos:
+    ==========
+    n: int
+        cantidad de ciudades
+
+    Retorno:
+    =======
+    acts: np.ndarray
+        matriz de m x 2 con una accion (i, j) por fila,
+        con 0 <= i < n-2, i+2 <= j < n y (i, j) != (0, n-1)
+    """
+    i, j = np.triu_indices(n, k=2)
+    keep = ~((i == 0) & (j == n - 1))  # aristas adyacentes
+    acts = np.column_stack((i[keep], j[keep])).astype(np.int32)
+    acts.flags.writeable = False
+    return acts
+
+
+def _or_opt_segments(n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Tramos (i, j) de largo 1 a OR_OPT_LENGTH que no contienen a v_0."""
+    i = np.concatenate([np.arange(0, n - length)
+                        for length in range(1, OR_OPT_LENGTH + 1)])
+    j = np.concatenate([np.arange(length, n)
+                        for length in range(1, OR_OPT_LENGTH + 1)])
+    return i, j
+
+
+@lru_cache(maxsize=ACTION_CACHE)
+def or_opt_actions(n: int) -> np.ndarray:
+    """Determina las acciones Or-opt de un TSP con n ciudades.
+
+    El resultado se guarda en cache (para los ultimos ACTION_CACHE
+    tamaños) y es de solo lectura, con indices de 32 bits.
+
+    Argumentos:
+    ==========
+    n: int
+        cantidad de ciudades
+
+    Retorno:
+    =======
+    acts: np.ndarray
+        matriz con una accion (i, j, k, r) por fila,
+        con 1 <= j-i <= OR_OPT_LENGTH, j < n, k < i o j < k < n, r en {0, 1}
+    """
+    i, j = _or_opt_segments(n)
+    i, j = i.astype(np.int32), j.astype(np.int32)
+    k = np.arange(n, dtype=np.int32)
+    i, j, k = (np.repeat(i, n), np.repeat(j, n), np.tile(k, len(i)))
+    valid = (k < i) | (k > j)
+    i, j, k = i[valid], j[valid], k[valid]
+    r = np.zeros(len(i), dtype=np.int32)
+    acts = np.column_stack((np.tile(i, 2), np.tile(j, 2), np.tile(k, 2),
+                            np.concatenate((r, r + 1))))
+    acts.flags.writeable = False
+    return acts
+
+
+def or_opt_result(state: State, action: Action) -> State:
+    """Determina el estado que resulta de aplicar una accion Or-opt.
+
+    Argumentos:
+    ==========
+    state: list[int]
+        un estado
+    action: tuple[int, int, int, int]
+        una accion Or-opt (i, j, k, r)
+
+    Retorno:
+    =======
+    succ: list[int]
+        estado sucesor
+    """
+    i, j, k, r = action
+    segment = state[i+1: j+1]
+    if r:
+        segment = segment[::-1]
+    if k > j:
+        return state[:i+1] + state[j+1:k+1] + segment + state[k+1:]
+    return state[:k+1] + segment + state[k+1:i+1] + state[j+1:]
+
+
+@lru_cache(maxsize=ACTION_CACHE)
+def _two_opt_tuples(n: int) -> tuple[Action, ...]:
+    """Version como tupla de tuplas de two_opt_actions."""
+    return tuple(map(tuple, two_opt_actions(n).tolist()))
+
+
+def best_actions(diff: np.ndarray) -> np.ndarray:
+    """Determina los indices de las acciones con mayor diferencia.
+
+    Argumentos:
+    ==========
+    diff: np.ndarray
+        vector de diferencias de valor objetivo, ver TSP.val_diff_array
+
+    Retorno:
+    =======
+    idx: np.ndarray
+        indices de todas las acciones que alcanzan el maximo
+    """
+    return np.flatnonzero(diff == diff.max())
+
+
+def top_actions(diff: np.ndarray, k: int) -> np.ndarray:
+    """Determina los indices de las k acciones con mayor diferencia.
+
+    Argumentos:
+    ==========
+    diff: np.ndarray
+        vector de diferencias de valor objetivo, ver TSP.val_diff_array
+    k: int
+        cantidad de acciones buscadas
+
+    Retorno:
+    =======
+    idx: np.ndarray
+        indices de las k mejores acciones, de mayor a menor diferencia
+    """
+    k = min(k, len(diff))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    idx = np.argpartition(diff, len(diff) - k)[len(diff) - k:]
+    return idx[np.argsort(diff[idx])[::-1]]
@@ -8,43 +8,206 @@ Las subclases que se encuentran en este modulo son:
 mejor valor objetivo, y los empates se resuelvan de forma aleatoria.
 Ya viene implementado.
 
+* HillClimbingFirstImprovement: algoritmo de ascension de colinas de primera
+mejora. Aplica el primer sucesor que mejora el valor objetivo, usando
+don't-look bits para no revisar ciudades sin movimientos de mejora.
+
 * HillClimbingReset: algoritmo de ascension de colinas de reinicio aleatorio.
-No viene implementado, se debe completar.
+Los reinicios pueden ejecutarse en paralelo en varios procesos.
 
 * Tabu: algoritmo de busqueda tabu.
-No viene implementado, se debe completar.
+
+* TabuReset: algoritmo de busqueda tabu con reinicio aleatorio.
+
+* SimulatedAnnealing: algoritmo de recocido simulado. Sortea una accion por
+iteracion y la evalua en O(1), con distintos esquemas de enfriamiento.
+
+* LinKernighan: algoritmo de Lin-Kernighan con movimientos 2-opt
+encadenados de profundidad variable, sobre listas de candidatos.
+
+* IteratedLocalSearch: busqueda local iterada. Perturba el optimo local
+aceptado con un double-bridge y lo re-optimiza con Lin-Kernighan.
+
+* GeneticTSP: algoritmo genetico con cruces OX o EAX, mejora local 2-opt y
+modelo de islas repartidas entre varios procesos.
+
+* ExactHeldKarp: algoritmo exacto de Held-Karp, para instancias chicas.
+
+Cada algoritmo tiene un nombre corto (ALGO_NAMES) con el que se lo puede
+construir mediante make_search.
 """
 
 
 from __future__ import annotations
-from problem import TSP
-from node import Node, Action
-from random import choice
+from problem import TSP, TWO_OPT, best_actions, make_rng, nearest_neighbors
+from node import Node, Action, compact
+from tour import Tour
+from delta import TwoOptTable
+from random import Random
 from time import time
+from math import ceil, exp, log
 from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from copy import copy
+from multiprocessing.synchronize import Event as ProcessEvent
+from threading import Event
+import multiprocessing
+import construct
+import numpy as np
+
+# Algoritmos involucrados
+HILL_CLIMBING = "hill"
+HILL_CLIMBING_FIRST = "hill_fi"
+HILL_CLIMBING_RANDOM_RESET = "hill_r"
+TABU_SEARCH = "tabu"
+TABU_RESET = "tabu_r"
+SIMULATED_ANNEALING = "sa"
+LIN_KERNIGHAN = "lk"
+ITERATED_LOCAL_SEARCH = "ils"
+GENETIC = "ga"
+EXACT_HELD_KARP = "exact"
+ALGO_NAMES = [HILL_CLIMBING, HILL_CLIMBING_FIRST, HILL_CLIMBING_RANDOM_RESET,
+              TABU_SEARCH, TABU_RESET, SIMULATED_ANNEALING, LIN_KERNIGHAN,
+              ITERATED_LOCAL_SEARCH, GENETIC, EXACT_HELD_KARP]
+# Algoritmos que se ejecutan si no se eligen otros; el exacto no, pues
+# solo admite instancias chicas, ni el genetico, que es mucho mas lento
+DEFAULT_ALGOS = [name for name in ALGO_NAMES
+                 if name not in (GENETIC, EXACT_HELD_KARP)]
 
 
 class LocalSearch:
     """Clase que representa un algoritmo de busqueda local general."""
 
-    def __init__(self) -> None:
-        """Construye una instancia de la clase."""
+    def __init__(self, moves: tuple[str, ...] = (TWO_OPT,),
+                 rng: Random | np.random.Generator | int | None = None,
+                 time_limit: float | None = None,
+                 max_evals: int | None = None) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        moves: tuple[str, ...]
+            familias de acciones que forman el vecindario (TWO_OPT, OR_OPT)
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios (o semilla) de la busqueda
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos, None para no limitarlo
+        max_evals: int | None
+            cantidad maxima de acciones evaluadas, None para no limitarla
+        """
+        self.moves = tuple(moves)
+        self.rng = make_rng(rng)
+        self.time_limit = time_limit
+        self.max_evals = max_evals
+        self._stop = Event()  # Si se pidio detener la busqueda
         self.niters = 0  # Numero de iteraciones totales
+        self.nevals = 0  # Numero de acciones evaluadas
         self.time = 0  # Tiempo de ejecucion
         self.tour = []  # Solucion, inicialmente vacia
         self.value = None  # Valor objetivo de la solucion
+        self.target = None  # Valor objetivo suficiente, ver stop_within
 
     def solve(self, problem: TSP):
         """Resuelve un problema de optimizacion."""
         self.tour = problem.init
         self.value = problem.obj_val(problem.init)
 
+    @property
+    def stopped(self) -> bool:
+        """Si se pidio detener la busqueda."""
+        return self._stop.is_set()
+
+    def stop(self) -> None:
+        """Pide detener la busqueda.
+
+        Puede llamarse desde otro hilo mientras se ejecuta self.solve,
+        que termina en la siguiente iteracion con el mejor estado
+        encontrado hasta el momento. El pedido lo comparten las copias
+        superficiales de la busqueda y las busquedas que esta ejecuta, en
+        el mismo proceso o en otros (ver _shared_stop).
+        """
+        self._stop.set()
+
+    def _shared_stop(self) -> ProcessEvent:
+        """Pedido de detencion que puede pasarse a otros procesos.
+
+        Reemplaza el Event de threading por uno de multiprocessing, que los
+        procesos de un pool reciben al crearse (ver _init_worker).
+        """
+        previous = self._stop
+        if not isinstance(previous, ProcessEvent):
+            self._stop = multiprocessing.Event()
+            # un stop() que llego a previous antes del reemplazo
+            if previous.is_set():
+                self._stop.set()
+        return self._stop
+
+    def __getstate__(self) -> dict:
+        """Estado para pickle, con el pedido de detencion como bool."""
+        state = self.__dict__.copy()
+        state["_stop"] = self.stopped
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restaura el estado de pickle con un pedido de detencion propio."""
+        stop = Event()
+        if state["_stop"]:
+            stop.set()
+        self.__dict__.update(state, _stop=stop)
+
+    def __copy__(self) -> LocalSearch:
+        """Copia superficial, que comparte el pedido de detencion."""
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        return new
+
+    def stop_within(self, bound: float, gap: float = 0.0) -> None:
+        """Pide detener la busqueda al llegar cerca de una cota inferior.
+
+        Argumentos:
+        ==========
+        bound: float
+            cota inferior del largo del tour optimo (ver bound.lower_bound)
+        gap: float
+            brecha relativa aceptable, por ejemplo 0.01 para detenerse con
+            un tour a lo sumo 1% mas largo que la cota
+        """
+        self.target = -bound * (1 + gap)
+
+    def exhausted(self, start: float, value: float | None = None) -> bool:
+        """Determina si se agoto el presupuesto de la busqueda.
+
+        Las busquedas lo consultan entre iteraciones, por lo que el
+        presupuesto puede excederse en a lo sumo una iteracion. Tambien
+        se considera agotado si se alcanzo el valor objetivo de
+        self.target (ver stop_within).
+
+        Argumentos:
+        ==========
+        start: float
+            instante de inicio de la busqueda, segun time()
+        value: float | None
+            valor objetivo del mejor estado encontrado hasta el momento
+        """
+        return (self.stopped
+                or (self.time_limit is not None
+                    and time() - start >= self.time_limit)
+                or (self.max_evals is not None
+                    and self.nevals >= self.max_evals)
+                or (self.target is not None and value is not None
+                    and value >= self.target - 1e-9 * abs(self.target)))
+
 
 class HillClimbing(LocalSearch):
     """Clase que representa un algoritmo de ascension de colinas.
 
     En cada iteracion se mueve al estado sucesor con mejor valor objetivo.
-    El criterio de parada es alcanzar un optimo local.
+    El criterio de parada es alcanzar un optimo local o agotar el
+    presupuesto de tiempo o de evaluaciones.
+
+    Con solo acciones 2-opt, las diferencias se guardan en una TwoOptTable
+    y tras cada movimiento solo se recalculan las que cambian.
     """
 
     def solve(self, problem: TSP):
@@ -58,26 +221,37 @@ class HillClimbing(LocalSearch):
         # Inicio del reloj
         start = time()
 
-        # Crear el nodo inicial
-        actual = Node(problem.init, problem.obj_val(problem.init))
+        # Crear el nodo inicial, cuyo recorrido se modifica en el lugar
+        actual = Node(Tour(problem.init), problem.obj_val(problem.init))
+        table = None
+        if self.moves == (TWO_OPT,):
+            table = TwoOptTable(problem, actual.state)
+            self.nevals += len(table)
 
         while True:
 
             # Determinar las acciones que se pueden aplicar
             # y las diferencias en valor objetivo que resultan
-            diff = problem.val_diff(actual.state)
-
-            # Buscar las acciones que generan el  mayor incremento de valor obj
-            max_acts = [act for act, val in diff.items() if val ==
-                        max(diff.values())]
+            # (salvo que se haya agotado el presupuesto)
+            if self.exhausted(start, actual.value):
+                act = None
+            elif table is not None:
+                act, val = table.best_move(self.rng)
+            else:
+                acts, diff = neighborhood(problem, actual.state, self.moves)
+                self.nevals += len(diff)
 
-            # Elegir una accion aleatoria
-            act = choice(max_acts)
+                # Buscar las acciones que generan el  mayor incremento de valor obj
+                # y elegir una de ellas de forma aleatoria
+                act = None
+                if len(diff):
+                    k = self.rng.choice(best_actions(diff))
+                    act, val = pick(acts, k), float(diff[k])
 
-            # Retornar si estamos en un optimo local
-            if diff[act] <= 0:
+            # Retornar si estamos en un optimo local o sin presupuesto
+            if act is None or val <= 0:
 
-                self.tour = actual.state
+                self.tour = actual.state.tolist()
                 self.value = actual.value
                 end = time()
                 self.time = end-start
@@ -86,116 +260,1707 @@ class HillClimbing(LocalSearch):
             # Sino, moverse a un nodo con el estado sucesor
             else:
 
-                actual = Node(problem.result(actual.state, act),
-                              actual.value + diff[act])
+                if table is not None:
+                    self.nevals += table.apply(act)
+                else:
+                    actual.state.move(act)
+                actual.value += val
                 self.niters += 1
 
 
-class HillClimbingReset(LocalSearch):
-    """Algoritmo de ascension de colinas con reinicio aleatorio."""
+class HillClimbingFirstImprovement(LocalSearch):
+    """Ascension de colinas de primera mejora con don't-look bits.
+
+    En lugar de evaluar todo el vecindario en cada iteracion, recorre las
+    ciudades y aplica el primer movimiento 2-opt que mejora el valor objetivo
+    sobre alguna de las dos aristas de la ciudad. Cada ciudad tiene un bit
+    de "no mirar" que se enciende cuando no tiene movimientos de mejora y se
+    apaga cuando alguna de sus aristas cambia.
+    El criterio de parada es alcanzar un optimo local o agotar el
+    presupuesto de tiempo o de evaluaciones.
+    Solo utiliza acciones 2-opt.
+    """
+
+    def solve(self, problem: TSP):
+        """Resuelve un problema de optimizacion con primera mejora.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        """
+        # Inicio del reloj
+        start = time()
+
+        n = problem.n
+        tour = Tour(problem.init)
+        value = problem.obj_val(problem.init)
+
+        # Ciudades que todavia hay que mirar, en orden de llegada
+        queue = deque(tour.order.tolist())
+        looking = np.ones(n, dtype=bool)
+
+        while queue and not self.exhausted(start, value):
+            city = queue.popleft()
+            looking[city] = False
+
+            # Probar con la arista que entra y la que sale de la ciudad
+            for p in ((tour.pos[city] - 1) % n, tour.pos[city]):
+                act, val, evals = self._first_improvement(problem, tour, p,
+                                                          city)
+                self.nevals += evals
+                if act is None:
+                    continue
+
+                # Ciudades cuyas aristas cambian con el movimiento
+                i, j = act
+                closed = np.asarray(tour)
+                ends = closed[[i, i+1, j, j+1]].tolist()
+
+                # Aplicar el movimiento en el lugar
+                tour.move(act)
+                value += val
+                self.niters += 1
+
+                # Despertar a las ciudades cuyas aristas cambiaron
+                for c in ends:
+                    if not looking[c]:
+                        looking[c] = True
+                        queue.append(c)
+                break
+
+        self.tour = tour.tolist()
+        self.value = value
+        self.time = time()-start
+
+    @staticmethod
+    def _first_improvement(problem: TSP, tour: Tour, p: int,
+                           city: int) -> tuple[Action | None, float, int]:
+        """Busca la primera accion de mejora que elimina la arista p.
+
+        Devuelve la accion (o None si no hay), su diferencia de valor
+        objetivo y la cantidad de acciones evaluadas.
+
+        La arista p es una de las dos aristas del tour que tocan a city.
+        Si el problema tiene listas de candidatos, solo se prueban las
+        acciones que unen la ciudad con alguno de sus vecinos cercanos.
+        """
+        n, pos = problem.n, tour.pos
+        if problem.neighbors is None:
+            q = np.arange(n)
+        elif tour.order[p] == city:
+            # arista que sale de la ciudad: agrega (city, c)
+            # junto con la arista q que sale de c
+            q = pos[problem.neighbors[city]]
+        else:
+            # arista que entra a la ciudad: agrega (city, c)
+            # junto con la arista q que entra a c
+            q = (pos[problem.neighbors[city]] - 1) % n
+        i, j = np.minimum(p, q), np.maximum(p, q)
+        valid = (j - i >= 2) & ~((i == 0) & (j == n - 1))
+        i, j = i[valid], j[valid]
+        diff = problem.two_opt_diff(tour, i, j)
+        better = np.flatnonzero(diff > 0)
+        if not len(better):
+            return None, 0, len(diff)
+        k = better[0]
+        return (int(i[k]), int(j[k])), float(diff[k]), len(diff)
+
+
+class RandomReset(LocalSearch):
+    """Busqueda local con reinicio aleatorio.
+
+    Ejecuta `attempts` busquedas independientes de la clase self.search,
+    la primera desde el estado inicial del problema y las demas desde un
+    estado aleatorio, y se queda con la mejor.
+
+    Los intentos pueden repartirse entre varios procesos (jobs > 1) o en
+    un Executor provisto. Cada intento recibe su propia semilla, sorteada
+    de antemano, por lo que el resultado no depende de como se repartan.
+    Los procesos reciben una unica vez una copia del problema sin el grafo
+    de networkx, solo con la matriz de distancias. Las semillas se sortean
+    con self.rng, y cada intento usa un generador propio para el estado
+    aleatorio y para la busqueda.
+
+    El limite de tiempo es comun a todos los intentos, y el de evaluaciones
+    se reparte en partes iguales entre ellos.
+
+    Al pedir detener la busqueda (ver stop) se interrumpen los intentos en
+    curso, en este proceso o en los del pool, y no se inician los
+    pendientes. Con un Executor provisto, los intentos en curso solo se
+    interrumpen si es un ThreadPoolExecutor; con otros terminan con su
+    propio presupuesto.
+    """
+
+    search = LocalSearch  # Busqueda que se reinicia
+
+    def __init__(self, moves: tuple[str, ...] = (TWO_OPT,), jobs: int = 1,
+                 executor: Executor | None = None,
+                 rng: Random | np.random.Generator | int | None = None,
+                 time_limit: float | None = None,
+                 max_evals: int | None = None) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        moves: tuple[str, ...]
+            familias de acciones que forman el vecindario (TWO_OPT, OR_OPT)
+        jobs: int
+            cantidad de procesos en los que se reparten los intentos
+        executor: Executor | None
+            executor donde ejecutar los intentos, en lugar de crear uno
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios (o semilla) de las semillas
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos, None para no limitarlo
+        max_evals: int | None
+            cantidad maxima de acciones evaluadas, None para no limitarla
+        """
+        super().__init__(moves, rng, time_limit, max_evals)
+        self.jobs = jobs
+        self.executor = executor
 
     def solve(self, problem: TSP, attempts = 10):
         start = time()
         self.value = float("-inf")
 
-        for _ in range(attempts):
-            solution = HillClimbing()
-            solution.solve(problem)
-            problem.random_reset()
-            self.niters += solution.niters
-            if self.value < solution.value:
-                self.tour = solution.tour
-                self.value = solution.value
-        
+        # presupuesto de cada intento
+        deadline = None if self.time_limit is None else start + self.time_limit
+        evals = None if self.max_evals is None else self.max_evals // attempts
+
+        # una semilla por intento; el primero parte del estado inicial
+        seeds = [self.rng.getrandbits(64) for _ in range(attempts)]
+        tasks = [(self.search, self.moves, seed, attempt > 0, deadline, evals,
+                  self.target)
+                 for attempt, seed in enumerate(seeds)]
+
+        if self.executor is not None:
+            # solo los hilos pueden compartir el Event de la busqueda
+            threads = isinstance(self.executor, ThreadPoolExecutor)
+            stop = self._stop if threads else None
+            futures = [self.executor.submit(_restart, *task, problem, stop)
+                       for task in tasks]
+            results = self._collect(futures)
+        elif self.jobs > 1:
+            stop = self._shared_stop()
+            pool = ProcessPoolExecutor(max_workers=self.jobs,
+                                       initializer=_init_worker,
+                                       initargs=(problem, stop))
+            try:
+                results = self._collect([pool.submit(_restart, *task)
+                                         for task in tasks])
+            finally:
+                pool.shutdown(cancel_futures=True)
+        else:
+            results = []
+            for task in tasks:
+                if self.stopped or (results and self.exhausted(
+                        start, max(result[1] for result in results))):
+                    break
+                # el intento comparte el pedido de detencion
+                results.append(_restart(*task, problem, self._stop))
+
+        # nos quedamos con el mejor, en orden de intento ante empates
+        for tour, value, niters, nevals in results:
+            self.niters += niters
+            self.nevals += nevals
+            if self.value < value:
+                self.tour = tour
+                self.value = value
+
         self.time = time()-start
 
+    def _collect(self, futures: list) -> list:
+        """Espera los intentos y devuelve sus resultados, en orden de intento.
+
+        Si se pide detener la busqueda se cancelan los intentos que no
+        empezaron, y solo se devuelven los que terminaron.
+        """
+        for future in as_completed(futures):
+            if self.stopped:
+                for pending in futures:
+                    pending.cancel()
+                break
+        return [future.result() for future in futures
+                if future.done() and not future.cancelled()]
+
+
+class HillClimbingReset(RandomReset):
+    """Algoritmo de ascension de colinas con reinicio aleatorio."""
+
+    search = HillClimbing
+
+
+class TabuList:
+    """Lista tabu de tamaño fijo.
+
+    Mantiene el orden FIFO de los atributos con una cola, y un contador
+    de ocurrencias para responder la pertenencia en O(1).
+    """
+
+    def __init__(self, tenure: int) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        tenure: int
+            cantidad maxima de atributos en la lista
+        """
+        self.tenure = tenure
+        self.queue = deque()
+        self.count = {}
+
+    def __len__(self) -> int:
+        """Cantidad de atributos en la lista."""
+        return len(self.queue)
+
+    def __contains__(self, attr: int) -> bool:
+        """Determina si un atributo es tabu, en O(1)."""
+        return attr in self.count
+
+    def append(self, attr: int) -> None:
+        """Agrega un atributo, descartando el mas antiguo si esta llena."""
+        if self.tenure <= 0:
+            return
+        if len(self.queue) == self.tenure:
+            old = self.queue.popleft()
+            self.count[old] -= 1
+            if not self.count[old]:
+                del self.count[old]
+        self.queue.append(attr)
+        self.count[attr] = self.count.get(attr, 0) + 1
+
+    def attrs(self) -> np.ndarray:
+        """Atributos tabu distintos, como arreglo."""
+        return np.fromiter(self.count, dtype=np.int64, count=len(self.count))
+
+    def mask(self, attrs: np.ndarray) -> np.ndarray:
+        """Determina en forma vectorizada que atributos son tabu."""
+        if not self.count:
+            return np.zeros(attrs.shape, dtype=bool)
+        return np.isin(attrs, self.attrs())
+
 
 class Tabu(LocalSearch):
-    """Algoritmo de busqueda tabu."""
+    """Algoritmo de busqueda tabu.
+
+    Los atributos tabu son aristas: al aplicar una accion, las aristas que
+    quita no pueden volver a agregarse mientras sigan en la lista tabu.
+    Una accion tabu se permite igual si lleva a un nuevo mejor estado
+    (criterio de aspiracion).
+
+    Se detiene tras max_iters iteraciones, tras max_no_improve iteraciones
+    sin mejoras significativas, o al agotar el presupuesto de tiempo o de
+    evaluaciones.
+
+    Con solo acciones 2-opt, las diferencias se guardan en una TwoOptTable
+    entre iteraciones y tras cada movimiento solo se recalculan las que
+    cambian, en lugar de evaluar todo el vecindario. En ese caso el sorteo
+    entre las acciones cercanas a la mejor se hace entre la mejor accion no
+    tabu de cada fila de la tabla (ver TwoOptTable.row_maxima), sin
+    recorrer toda la tabla en cada iteracion.
+    """
+
+    def __init__(self, moves: tuple[str, ...] = (TWO_OPT,),
+                 rng: Random | np.random.Generator | int | None = None,
+                 time_limit: float | None = None,
+                 max_evals: int | None = None,
+                 max_iters: int | None = None,
+                 max_no_improve: int | None = None) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        moves: tuple[str, ...]
+            familias de acciones que forman el vecindario (TWO_OPT, OR_OPT)
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios (o semilla) de la busqueda
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos, None para no limitarlo
+        max_evals: int | None
+            cantidad maxima de acciones evaluadas, None para no limitarla
+        max_iters: int | None
+            cantidad maxima de iteraciones, None para usar 5*n
+        max_no_improve: int | None
+            cantidad maxima de iteraciones sin mejoras, None para usar n/3
+        """
+        super().__init__(moves, rng, time_limit, max_evals)
+        self.max_iters = max_iters
+        self.max_no_improve = max_no_improve
 
     def solve(self, problem: TSP):
         start = time()
+        max_iters = self.max_iters
+        if max_iters is None:
+            max_iters = len(problem.init)*5
+        max_no_improve = self.max_no_improve
+        if max_no_improve is None:
+            max_no_improve = len(problem.init)//3
 
-        actual = Node(problem.init, problem.obj_val(problem.init))
-        best = actual
-        # Creamos una lista tabu que solo pueda guardar una cantidad limite de acciones, de modo tal,
-        # de no privar al metodo de explorar acciones pasadas que puedan ser convinientes en
+        # el recorrido actual se modifica en el lugar, y solo se copia
+        # cuando se encuentra un nuevo mejor estado
+        actual = Node(Tour(problem.init), problem.obj_val(problem.init))
+        best = Node(actual.state.copy(), actual.value)
+        table = None
+        if self.moves == (TWO_OPT,):
+            table = TwoOptTable(problem, actual.state)
+            self.nevals += len(table)
+        # Creamos una lista tabu que solo pueda guardar una cantidad limite de aristas, de modo tal,
+        # de no privar al metodo de explorar aristas pasadas que puedan ser convinientes en
         # estados mas recientes.
-        # este valor es arbitrario y empirico de correrlo sobre varios recorridos.
-        tabu = deque(maxlen=len(problem.init)//5)
+        # este valor es arbitrario y empirico de correrlo sobre varios recorridos
+        # (la quinta parte de las ciudades, por dos aristas por accion).
+        tabu = TabuList(2*(len(problem.init)//5))
         # contador para terminar el algoritmo en caso de que no se haya encontrado mejoras, 
         # un numero determinado de veces
         no_improvements_counter = 0
 
         while True:
             # criterio de parada arbitrario modulado por el numero de puntos
-            if no_improvements_counter > len(problem.init)//3:
+            if no_improvements_counter > max_no_improve:
                 break
 
             # No puede quedarse iterando indefinidamente, por lo que se le agrega
             # otra parada.
-            if self.niters > len(problem.init)*5:
+            if self.niters > max_iters:
+                break
+
+            # Ni superar el presupuesto de tiempo o de evaluaciones
+            if self.exhausted(start, best.value):
                 break
 
             self.niters += 1
-            diff = problem.val_diff(actual.state)
+            if table is not None:
+                # con la tabla se elige entre la mejor accion no tabu de
+                # cada fila; solo se recorren las filas cuyo maximo es tabu
+                blocked = None
+                if tabu:
+                    idx = table.adding(tabu.attrs())
+                    aspiration = actual.value + table.diff[idx] > best.value
+                    blocked = idx[~aspiration]
+                diff, entries = table.row_maxima(blocked)
+            else:
+                acts, diff = neighborhood(problem, actual.state, self.moves)
+                self.nevals += len(diff)
+
+            # filtramos aquellas que agregan alguna arista de la lista tabú,
+            # salvo que mejoren al mejor estado encontrado (aspiración)
+            if tabu and table is None:
+                is_tabu = np.concatenate(
+                    [tabu.mask(problem.move_edges(actual.state, family)[0])
+                     .any(axis=1) for family in acts])
+                aspiration = actual.value + diff > best.value
+                diff = np.where(is_tabu & ~aspiration, -np.inf, diff)
 
-            # filtramos aquellas que no estén en la lista tabú
-            diff = {act: val for act, val in diff.items() if act not in tabu}
+            # de no haber acciones disponibles, sale.
+            if not len(diff) or diff.max() == -np.inf:
+                break
 
             # buscamos el mejor score disponible
-            max_val = max(diff.values())
+            max_val = diff.max()
             
             # tomamos todas las acciones posibles que estén como máximo a una 
             # distancia del 5% del score máximo. así, permitimos aumentar el 
             # espacio de estados potencial a explorar, permitiendo recorrer más
             # caminos subóptimos (simil, Gradiente Estocástico)
-            bests_act_val = [(act, val) for act, val in diff.items()
-                             if abs(max_val - val) <= 0.05*abs(max_val)]
+            bests = np.flatnonzero(np.abs(max_val - diff) <= 0.05*abs(max_val))
 
             # de no haber acciones disponibles, sale.
             # generalmente ocacionado por la cantidad de restricciones en la lista tabu.
-            if not bests_act_val:
+            if not len(bests):
                 break
 
             # elegimos una acción al azar
-            act, val = choice(bests_act_val)
-            neightbour = Node(problem.result(actual.state, act), actual.value + val)
+            k = self.rng.choice(bests)
+            if table is not None:
+                act = table.action(entries[k])
+            else:
+                act = pick(acts, k)
+            val = float(diff[k])
+            _, removed = problem.move_edges(actual.state, np.array([act]))
+            if table is not None:
+                self.nevals += table.apply(act)
+            else:
+                actual.state.move(act)
+            actual.value += val
 
             # si, nuestro estado vecino, no mejora en 0.01% nuestro score, 
             # se considera que no aportó mejora significativa.
-            if (best.value - neightbour.value)/best.value < 1e-4:
+            if (best.value - actual.value)/best.value < 1e-4:
                 no_improvements_counter += 1
 
             # si el score del estado es mejor, reemplazamos el mejor por el vecino.
-            if best.value < neightbour.value:
-                best = neightbour
+            if best.value < actual.value:
+                best = Node(actual.state.copy(), actual.value)
 
-            # insertamos la acción en la lista tabú para evitar caminos ciclicos/redundantes
-            tabu.append(act)
-            actual = neightbour
+            # insertamos las aristas quitadas en la lista tabú para evitar caminos ciclicos/redundantes
+            for edge in removed[0].tolist():
+                tabu.append(edge)
 
-        self.tour = best.state
+        self.tour = best.state.tolist()
         self.value = best.value
         end = time()
         self.time = end-start
 
-class TabuReset(LocalSearch):
+class TabuReset(RandomReset):
     """Algoritmo Tabú con reinicio aleatorio.
     exactamente igual al HillClimbingReset pero instanciando con la clase Tabu
     """
 
-    def solve(self, problem: TSP, attempts = 10):
+    search = Tabu
+
+
+class SimulatedAnnealing(LocalSearch):
+    """Algoritmo de recocido simulado.
+
+    En cada iteracion sortea una accion 2-opt al azar (entre los candidatos
+    si el problema los tiene), calcula su diferencia de valor objetivo en
+    O(1) leyendo la matriz de distancias, y la aplica si mejora o, si
+    empeora en delta, con probabilidad exp(delta / T).
+
+    La temperatura T se mantiene durante `epoch` iteraciones y luego se
+    enfria segun el esquema elegido:
+    * "geometric": T = alpha * T
+    * "linear": T = T - (t0 - t_min) / m
+    * "lundy": T = T / (1 + beta * T), con beta = (1/t_min - 1/t0) / m
+      (Lundy y Mees)
+    donde m = log(t_min / t0) / log(alpha) es la cantidad de epocas del
+    esquema geometrico, de modo que los tres llegan a t_min a la vez.
+    Al llegar a t_min se recalienta a t0 hasta `reheats` veces.
+    El criterio de parada es llegar a t_min sin recalentamientos restantes,
+    o agotar el presupuesto de iteraciones, de tiempo o de evaluaciones.
+    Siempre se devuelve el mejor estado visto.
+    Solo utiliza acciones 2-opt.
+    """
+
+    SCHEDULES = ["geometric", "linear", "lundy"]
+
+    def __init__(self, moves: tuple[str, ...] = (TWO_OPT,),
+                 rng: Random | np.random.Generator | int | None = None,
+                 time_limit: float | None = None,
+                 max_evals: int | None = None,
+                 t0: float | None = None, t_min: float = 1e-3,
+                 schedule: str = "geometric", alpha: float = 0.95,
+                 epoch: int | None = None, max_iters: int | None = None,
+                 reheats: int = 0) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        moves: tuple[str, ...]
+            familias de acciones, se ignora pues solo se usa 2-opt
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios (o semilla) de la busqueda
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos, None para no limitarlo
+        max_evals: int | None
+            cantidad maxima de acciones evaluadas, None para no limitarla
+        t0: float | None
+            temperatura inicial, None para estimarla de modo que un
+            empeoramiento promedio se acepte con probabilidad 1/2
+        t_min: float
+            temperatura final
+        schedule: str
+            esquema de enfriamiento, uno de SimulatedAnnealing.SCHEDULES
+        alpha: float
+            parametro del esquema de enfriamiento, entre 0 y 1
+        epoch: int | None
+            iteraciones por temperatura, None para usar 20*n
+        max_iters: int | None
+            cantidad maxima de iteraciones, None para no limitarla
+        reheats: int
+            cantidad de recalentamientos
+        """
+        super().__init__(moves, rng, time_limit, max_evals)
+        if schedule not in self.SCHEDULES:
+            raise ValueError("Unknown cooling schedule: {}".format(schedule))
+        self.t0 = t0
+        self.t_min = t_min
+        self.schedule = schedule
+        self.alpha = alpha
+        self.epoch = epoch
+        self.max_iters = max_iters
+        self.reheats = reheats
+
+    def solve(self, problem: TSP):
+        """Resuelve un problema de optimizacion con recocido simulado.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        """
+        # Inicio del reloj
         start = time()
-        self.value = float("-inf")
 
-        for _ in range(attempts):
-            solution = Tabu()
-            solution.solve(problem)
-            problem.random_reset()
-            self.niters += solution.niters
-            if self.value < solution.value:
-                self.tour = solution.tour
-                self.value = solution.value
-        
-        self.time = time()-start
\ No newline at end of file
+        n = problem.n
+        tour = Tour(problem.init)
+        value = problem.obj_val(problem.init)
+        best = Node(tour.copy(), value)
+        if n < 4:  # no hay acciones 2-opt
+            self.tour, self.value = best.state.tolist(), best.value
+            self.time = time()-start
+            return
+
+        dist = problem.dist
+        order, pos = tour.order, tour.pos
+        rng = self.rng
+        epoch = self.epoch or 20 * n
+
+        t0 = self.t0 if self.t0 is not None else self._initial_temp(problem,
+                                                                   tour)
+        temp = t0
+        reheats = self.reheats
+        # cantidad de epocas hasta llegar a t_min
+        steps = max(1, ceil(log(self.t_min / t0) / log(self.alpha)))
+
+        stop = False
+        while not stop:
+            for _ in range(epoch):
+                # el presupuesto tambien se consulta dentro de cada epoca
+                if self.max_iters is not None and \
+                        self.niters >= self.max_iters:
+                    stop = True
+                    break
+                if not self.niters % 256 and self.exhausted(start,
+                                                            best.value):
+                    stop = True
+                    break
+                i, j = self._sample(problem, tour)
+                a, b = order[i], order[(i+1) % n]
+                c, d = order[j], order[(j+1) % n]
+                delta = float(dist[a, b] + dist[c, d] - dist[a, c]
+                              - dist[b, d])
+                self.niters += 1
+                self.nevals += 1
+
+                # Aceptar si mejora, o con probabilidad exp(delta / T)
+                if delta >= 0 or rng.random() < exp(delta / temp):
+                    tour.move((i, j))
+                    value += delta
+                    if value > best.value:
+                        best = Node(tour.copy(), value)
+
+            # Enfriar, o recalentar si se llego a la temperatura final
+            temp = self._cool(temp, t0, steps)
+            if temp <= self.t_min:
+                if not reheats:
+                    break
+                reheats -= 1
+                temp = t0
+
+            if self.exhausted(start, best.value):
+                break
+
+        self.tour = best.state.tolist()
+        self.value = best.value
+        self.time = time()-start
+
+    def _sample(self, problem: TSP, tour: Tour,
+                attempts: int = 10) -> Action:
+        """Sortea una accion 2-opt (i, j) valida.
+
+        Con listas de candidatos puede que todos los candidatos sean ya
+        vecinos en el recorrido; tras `attempts` intentos fallidos se
+        sortea una accion cualquiera del vecindario completo.
+        """
+        n, rng = problem.n, self.rng
+        if problem.neighbors is not None:
+            for _ in range(attempts):
+                # accion que agrega la arista (a, c), con c candidato de a
+                a = rng.randrange(n)
+                c = problem.neighbors[a][rng.randrange(
+                    problem.neighbors.shape[1])]
+                p, q = tour.pos[a], tour.pos[c]
+                i, j = (p, q) if p < q else (q, p)
+                if j - i >= 2 and not (i == 0 and j == n - 1):
+                    return int(i), int(j)
+        # accion uniforme: 0 <= i < n-2, i+2 <= j < n, (i, j) != (0, n-1)
+        i = rng.randrange(n - 2)
+        j = rng.randrange(i + 2, n - 1 if i == 0 else n)
+        return i, j
+
+    def _initial_temp(self, problem: TSP, tour: Tour,
+                      samples: int = 100) -> float:
+        """Estima la temperatura inicial a partir de acciones al azar."""
+        acts = np.array([self._sample(problem, tour) for _ in range(samples)])
+        diff = problem.two_opt_diff(tour, acts[:, 0], acts[:, 1])
+        worse = -diff[diff < 0]
+        if not len(worse):
+            return self.t_min
+        return float(worse.mean() / log(2))
+
+    def _cool(self, temp: float, t0: float, steps: int) -> float:
+        """Aplica un paso del esquema de enfriamiento."""
+        if self.schedule == "geometric":
+            return self.alpha * temp
+        if self.schedule == "linear":
+            return temp - (t0 - self.t_min) / steps
+        beta = (1 / self.t_min - 1 / t0) / steps
+        return temp / (1 + beta * temp)
+
+
+class LinKernighan(LocalSearch):
+    """Algoritmo de Lin-Kernighan, en su variante con movimientos 2-opt.
+
+    Para cada ciudad t1 (con don't-look bits, como en
+    HillClimbingFirstImprovement) y cada vecina t2 en el recorrido, se
+    construye una cadena de movimientos 2-opt de profundidad variable:
+    se quita la arista (t1, t2), se agrega (t2, t3) con t3 candidato de t2,
+    se quita (t3, t4) y el recorrido se cierra momentaneamente con (t4, t1).
+    Luego (t4, t1) pasa a ser la arista a quitar y se repite, mientras la
+    ganancia parcial sea positiva. Al final se conserva el prefijo de la
+    cadena con mayor ganancia al cerrar el recorrido, y se deshace el resto.
+
+    Las aristas agregadas en una cadena no se vuelven a quitar y las
+    quitadas no se vuelven a agregar. En el primer nivel se prueban las
+    `breadth` mejores alternativas para t3, y en los siguientes solo la
+    mejor. Se usan las listas de candidatos del problema, o las de los
+    K vecinos mas cercanos si el problema no las tiene.
+    El criterio de parada es alcanzar un optimo local o agotar el
+    presupuesto de tiempo o de evaluaciones.
+    """
+
+    K = 10  # Vecinos cercanos a usar si el problema no tiene candidatos
+
+    def __init__(self, moves: tuple[str, ...] = (TWO_OPT,),
+                 rng: Random | np.random.Generator | int | None = None,
+                 time_limit: float | None = None,
+                 max_evals: int | None = None,
+                 max_depth: int = 50, breadth: int = 5) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        moves: tuple[str, ...]
+            familias de acciones, se ignora pues solo se usa 2-opt
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios (o semilla) de la busqueda
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos, None para no limitarlo
+        max_evals: int | None
+            cantidad maxima de acciones evaluadas, None para no limitarla
+        max_depth: int
+            cantidad maxima de movimientos 2-opt de cada cadena
+        breadth: int
+            alternativas para t3 en el primer nivel de cada cadena
+        """
+        super().__init__(moves, rng, time_limit, max_evals)
+        self.max_depth = max_depth
+        self.breadth = breadth
+
+    def solve(self, problem: TSP):
+        """Resuelve un problema de optimizacion con Lin-Kernighan.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        """
+        # Inicio del reloj
+        start = time()
+
+        n = problem.n
+        tour = Tour(problem.init)
+        value = problem.obj_val(problem.init)
+        neighbors = problem.neighbors
+        if neighbors is None:
+            neighbors = nearest_neighbors(problem.dist, self.K)
+
+        # Ciudades que todavia hay que mirar, en orden de llegada
+        queue = deque(tour.order.tolist())
+        looking = np.ones(n, dtype=bool)
+        if n >= 5:
+            value = self._optimize(problem, neighbors, tour, value, queue,
+                                   looking, start)
+
+        self.tour = tour.tolist()
+        self.value = value
+        self.time = time()-start
+
+    def _optimize(self, problem: TSP, neighbors: np.ndarray, tour: Tour,
+                  value: float, queue: deque, looking: np.ndarray,
+                  start: float) -> float:
+        """Aplica cadenas de mejora hasta que no quedan ciudades por mirar.
+
+        Las ciudades de la cola tienen su don't-look bit apagado
+        (looking[c] = True). Retorna el nuevo valor objetivo del recorrido,
+        que se modifica en el lugar. Si se agota el presupuesto, pueden
+        quedar ciudades en la cola.
+        """
+        while queue and not self.exhausted(start, value):
+            t1 = queue.popleft()
+            looking[t1] = False
+
+            for t2 in (tour.succ(t1), tour.pred(t1)):
+                gain, touched = self._chain(problem.dist, neighbors, tour,
+                                            t1, t2)
+                if gain <= 0:
+                    continue
+                value += gain
+                self.niters += 1
+
+                # Despertar a las ciudades cuyas aristas cambiaron
+                for c in touched:
+                    if not looking[c]:
+                        looking[c] = True
+                        queue.append(c)
+                break
+        return value
+
+    def _chain(self, dist: np.ndarray, neighbors: np.ndarray, tour: Tour,
+               t1: int, t2: int) -> tuple[float, list[int]]:
+        """Busca y aplica una cadena de mejora que quita la arista (t1, t2).
+
+        Retorna la ganancia (disminucion del largo del recorrido), o 0 si
+        no hay cadena de mejora, y las ciudades cuyas aristas cambiaron.
+        """
+        d12 = dist[t1, t2]
+        first = self._choices(dist, neighbors, tour, t1, t2, d12,
+                              {_edge(t1, t2)}, set())
+        for t3, t4 in first[:self.breadth]:
+            gain = d12  # largo quitado menos largo agregado, sin cerrar
+            removed, added = {_edge(t1, t2)}, set()
+            moves = []
+            best_gain, best_len = 0, 0
+
+            while True:
+                # quitar (t1, t2) y (t3, t4), agregar (t2, t3) y (t4, t1)
+                tour.two_opt(t2, t1, t3, t4)
+                moves.append((t2, t1, t3, t4))
+                added.add(_edge(t2, t3))
+                removed.add(_edge(t3, t4))
+                gain += dist[t3, t4] - dist[t2, t3]
+
+                # ganancia si se cierra el recorrido con (t4, t1)
+                closed = gain - dist[t4, t1]
+                if closed > best_gain:
+                    best_gain, best_len = closed, len(moves)
+                if len(moves) >= self.max_depth:
+                    break
+
+                # la arista de cierre (t1, t4) es la siguiente a quitar
+                t2 = t4
+                nxt = self._choices(dist, neighbors, tour, t1, t2, gain,
+                                    removed, added)
+                if not nxt:
+                    break
+                t3, t4 = nxt[0]
+
+            # deshacer los movimientos posteriores al mejor cierre
+            for a, b, c, d in reversed(moves[best_len:]):
+                tour.two_opt(a, c, b, d)
+            if best_gain > 0:
+                touched = {t for move in moves[:best_len] for t in move}
+                return float(best_gain), list(touched)
+
+            # se deshizo toda la cadena: probar con la siguiente alternativa
+            t2 = moves[0][0]
+        return 0, []
+
+    def _choices(self, dist: np.ndarray, neighbors: np.ndarray, tour: Tour,
+                 t1: int, t2: int, gain: float, removed: set,
+                 added: set) -> list[tuple[int, int]]:
+        """Determina los pares (t3, t4) para continuar una cadena.
+
+        Se ordenan de mayor a menor dist[t3, t4] - dist[t2, t3], y solo se
+        incluyen los que mantienen positiva la ganancia parcial.
+        """
+        forward = tour.succ(t1) == t2
+        succ2, pred2 = tour.succ(t2), tour.pred(t2)
+        choices = []
+        for t3 in neighbors[t2].tolist():
+            self.nevals += 1
+            g1 = gain - dist[t2, t3]
+            if g1 <= 0:
+                break  # los candidatos estan ordenados por distancia
+            if t3 == t1 or t3 == succ2 or t3 == pred2:
+                continue
+            if _edge(t2, t3) in removed:
+                continue
+            t4 = tour.pred(t3) if forward else tour.succ(t3)
+            if t4 == t2 or _edge(t3, t4) in added:
+                continue
+            choices.append((dist[t3, t4] - dist[t2, t3], t3, t4))
+        choices.sort(reverse=True)
+        return [(t3, t4) for _, t3, t4 in choices]
+
+
+class IteratedLocalSearch(LinKernighan):
+    """Busqueda local iterada sobre Lin-Kernighan.
+
+    Parte de un optimo local de LinKernighan y repite: perturba el recorrido
+    actual con un double-bridge local, re-optimiza y decide si acepta el
+    resultado como nuevo recorrido actual. A diferencia de los reinicios
+    aleatorios, conserva casi toda la estructura del optimo local.
+
+    El double-bridge intercambia dos tramos consecutivos cortos del
+    recorrido (A B C D pasa a ser A C B D), un cambio que las cadenas 2-opt
+    no deshacen facilmente. Como cambian solo las aristas de 6 ciudades,
+    la re-optimizacion empieza con los don't-look bits de esas ciudades
+    apagados y el resto encendidos, por lo que cuesta mucho menos que
+    optimizar el recorrido entero.
+
+    Criterios de aceptacion del recorrido re-optimizado:
+    * "better": solo si mejora al actual.
+    * "equal": si no empeora al actual.
+    * "walk": siempre.
+    La perturbacion se aplica siempre al recorrido actual, que con "equal" o
+    "walk" puede no ser el mejor; el mejor encontrado se guarda aparte.
+    El criterio de parada es aplicar max_iters perturbaciones (por defecto
+    n) o agotar el presupuesto de tiempo o de evaluaciones.
+    """
+
+    ACCEPT = ("better", "equal", "walk")
+
+    def __init__(self, moves: tuple[str, ...] = (TWO_OPT,),
+                 rng: Random | np.random.Generator | int | None = None,
+                 time_limit: float | None = None,
+                 max_evals: int | None = None,
+                 max_iters: int | None = None, accept: str = "equal",
+                 segment: int = 50, max_depth: int = 50,
+                 breadth: int = 5) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        moves: tuple[str, ...]
+            familias de acciones, se ignora pues solo se usa 2-opt
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios (o semilla) de la busqueda
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos, None para no limitarlo
+        max_evals: int | None
+            cantidad maxima de acciones evaluadas, None para no limitarla
+        max_iters: int | None
+            cantidad maxima de perturbaciones, None para usar n
+        accept: str
+            criterio de aceptacion, uno de ACCEPT
+        segment: int
+            largo maximo de cada tramo del double-bridge
+        max_depth: int
+            cantidad maxima de movimientos 2-opt de cada cadena
+        breadth: int
+            alternativas para t3 en el primer nivel de cada cadena
+        """
+        if accept not in self.ACCEPT:
+            raise ValueError("Unknown acceptance criterion: {}".format(accept))
+        super().__init__(moves, rng, time_limit, max_evals, max_depth,
+                         breadth)
+        self.max_iters = max_iters
+        self.accept = accept
+        self.segment = segment
+
+    def solve(self, problem: TSP):
+        """Resuelve un problema de optimizacion con busqueda local iterada.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        """
+        # Inicio del reloj
+        start = time()
+
+        n, dist, rng = problem.n, problem.dist, self.rng
+        current = Tour(problem.init)
+        value = problem.obj_val(problem.init)
+        neighbors = problem.neighbors
+        if neighbors is None:
+            neighbors = nearest_neighbors(dist, self.K)
+
+        # Optimo local de partida
+        queue = deque(current.order.tolist())
+        looking = np.ones(n, dtype=bool)
+        if n >= 5:
+            value = self._optimize(problem, neighbors, current, value, queue,
+                                   looking, start)
+        best = Node(current.copy(), value)
+
+        max_iters = self.max_iters if self.max_iters is not None else n
+        length = min(self.segment, (n - 2) // 2)
+        kicks = 0
+        while (n >= 8 and kicks < max_iters
+               and not self.exhausted(start, best.value)):
+            kicks += 1
+
+            # Perturbar una copia del recorrido actual
+            trial = current.copy()
+            p = rng.randrange(n)
+            l1, l2 = rng.randint(1, length), rng.randint(1, length)
+            a, b1, b2, c1, c2, d = (
+                int(trial.order[(p + k) % n])
+                for k in (0, 1, l1, l1 + 1, l1 + l2, l1 + l2 + 1))
+            trial_value = value + float(
+                dist[a, b1] + dist[b2, c1] + dist[c2, d]
+                - dist[a, c1] - dist[c2, b1] - dist[b2, d])
+            trial.double_bridge(p, l1, l2)
+
+            # Re-optimizar solo alrededor de las aristas nuevas
+            queue.clear()
+            looking.fill(False)
+            for c in (a, b1, b2, c1, c2, d):
+                if not looking[c]:
+                    looking[c] = True
+                    queue.append(c)
+            trial_value = self._optimize(problem, neighbors, trial,
+                                         trial_value, queue, looking, start)
+
+            if trial_value > best.value:
+                best = Node(trial.copy(), trial_value)
+            if (self.accept == "walk"
+                    or trial_value > value
+                    or (self.accept == "equal" and trial_value == value)):
+                current, value = trial, trial_value
+
+        self.tour = best.state.tolist()
+        self.value = best.value
+        self.time = time()-start
+
+
+class GeneticTSP(LinKernighan):
+    """Algoritmo genetico con modelo de islas.
+
+    La poblacion de cada isla se guarda en una matriz de NumPy de
+    pop_size x n, con un recorrido por fila que empieza en la ciudad 0 (sin
+    repetirla al final), y sus valores objetivo en un vector aparte. La
+    poblacion inicial se construye con el vecino mas cercano desde ciudades
+    al azar, mejorado con 2-opt.
+
+    En cada generacion se recorre la poblacion en un orden al azar y cada
+    individuo A se cruza con el siguiente B:
+    * "ox": cruce de orden. El hijo copia un tramo de A y completa con las
+    ciudades restantes en el orden en que aparecen en B.
+    * "eax": cruce de ensamblado de aristas. Se arman los ciclos AB, que
+    alternan aristas de A y de B que no son comunes a ambos, y se aplica
+    uno al azar a A (se quitan sus aristas de A y se agregan las de B). Los
+    subtours que quedan se unen con el intercambio 2-opt mas barato entre
+    candidatos cercanos.
+    Con probabilidad `mutation` el hijo recibe ademas un movimiento 2-opt
+    al azar. Luego se mejora con cadenas 2-opt (ver LinKernighan, de
+    profundidad max_depth) mirando solo las ciudades cuyas aristas difieren
+    de las de A, y reemplaza a A si es mejor y no esta ya en la poblacion.
+
+    Las islas evolucionan por separado, repartidas entre `jobs` procesos, y
+    cada migrate_every generaciones cada una envia sus `migrants` mejores
+    individuos a la siguiente (en anillo), donde reemplazan a los peores.
+    Las islas se sincronizan en cada migracion y cada una usa su propia
+    semilla, por lo que el resultado no depende de la cantidad de procesos.
+
+    El criterio de parada es alcanzar max_generations generaciones, pasar
+    max_no_improve generaciones sin mejorar el mejor recorrido, que ninguna
+    isla acepte hijos entre dos migraciones (las poblaciones convergieron)
+    o agotar el presupuesto de tiempo o de evaluaciones. Un pedido de
+    detencion (ver stop) interrumpe a las islas en curso, tambien en los
+    procesos del pool.
+    """
+
+    CROSSOVERS = ("ox", "eax")
+
+    def __init__(self, moves: tuple[str, ...] = (TWO_OPT,),
+                 rng: Random | np.random.Generator | int | None = None,
+                 time_limit: float | None = None,
+                 max_evals: int | None = None,
+                 pop_size: int = 20, islands: int = 4, jobs: int = 1,
+                 crossover: str = "eax", mutation: float = 0.1,
+                 migrate_every: int = 10, migrants: int = 2,
+                 max_generations: int | None = None,
+                 max_no_improve: int = 20, max_depth: int = 3,
+                 breadth: int = 5) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        moves: tuple[str, ...]
+            familias de acciones, se ignora pues solo se usa 2-opt
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios (o semilla) de las semillas
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos, None para no limitarlo
+        max_evals: int | None
+            cantidad maxima de acciones evaluadas, None para no limitarla
+        pop_size: int
+            cantidad de individuos de cada isla
+        islands: int
+            cantidad de islas
+        jobs: int
+            cantidad de procesos en los que se reparten las islas
+        crossover: str
+            cruce, uno de CROSSOVERS
+        mutation: float
+            probabilidad de aplicar un movimiento 2-opt al azar a cada hijo
+        migrate_every: int
+            generaciones entre migraciones
+        migrants: int
+            individuos que envia cada isla en cada migracion
+        max_generations: int | None
+            cantidad maxima de generaciones, None para no limitarla
+        max_no_improve: int
+            cantidad maxima de generaciones sin mejorar el mejor recorrido
+        max_depth: int
+            cantidad maxima de movimientos 2-opt de cada cadena de mejora
+        breadth: int
+            alternativas en el primer nivel de cada cadena de mejora
+        """
+        if crossover not in self.CROSSOVERS:
+            raise ValueError("Unknown crossover: {}".format(crossover))
+        super().__init__(moves, rng, time_limit, max_evals, max_depth,
+                         breadth)
+        self.pop_size = pop_size
+        self.islands = islands
+        self.jobs = jobs
+        self.crossover = crossover
+        self.mutation = mutation
+        self.migrate_every = migrate_every
+        self.migrants = migrants
+        self.max_generations = max_generations
+        self.max_no_improve = max_no_improve
+
+    def solve(self, problem: TSP):
+        """Resuelve un problema de optimizacion con un algoritmo genetico.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        """
+        # Inicio del reloj
+        start = time()
+        if problem.n < 8:
+            super().solve(problem)
+            return
+
+        # copia superficial con listas de candidatos, que comparten las islas
+        shared = copy(problem)
+        if shared.neighbors is None:
+            shared.neighbors = nearest_neighbors(problem.dist, self.K)
+
+        deadline = None if self.time_limit is None else start + self.time_limit
+        islands = [(None, None)] * self.islands
+        best, stale = None, 0
+        pool = None
+        if self.jobs > 1:
+            stop = self._shared_stop()
+            pool = ProcessPoolExecutor(max_workers=self.jobs,
+                                       initializer=_init_worker,
+                                       initargs=(shared, stop))
+        try:
+            while True:
+                generations = self.migrate_every
+                if self.max_generations is not None:
+                    generations = min(generations,
+                                      self.max_generations - self.niters)
+                evals = None
+                if self.max_evals is not None:
+                    evals = max(0, self.max_evals - self.nevals) // self.islands
+                tasks = [(self, pop, values, self.rng.getrandbits(64),
+                          generations, deadline, evals, self.target,
+                          problem.init if k == 0 else None)
+                         for k, (pop, values) in enumerate(islands)]
+                if pool is not None:
+                    results = list(pool.map(_island, *zip(*tasks)))
+                else:
+                    results = [_island(*task, shared) for task in tasks]
+
+                islands, accepted = [], 0
+                for pop, values, nevals, children in results:
+                    self.nevals += nevals
+                    accepted += children
+                    islands.append((pop, values))
+                self.niters += generations
+
+                # mejor recorrido de todas las islas
+                pop, values = max(islands, key=lambda isl: isl[1].max())
+                k = int(np.argmax(values))
+                if best is None or values[k] > best.value:
+                    best, stale = Node(np.append(pop[k], pop[k][0]),
+                                       float(values[k])), 0
+                else:
+                    stale += generations
+
+                if (stale >= self.max_no_improve or not accepted
+                        or (self.max_generations is not None
+                            and self.niters >= self.max_generations)
+                        or self.exhausted(start, best.value)):
+                    break
+                self._migrate(islands)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.tour = best.state.tolist()
+        self.value = best.value
+        self.time = time()-start
+
+    def _populate(self, problem: TSP, init: list[int] | None,
+                  start: float) -> tuple[np.ndarray, np.ndarray]:
+        """Construye la poblacion inicial de una isla.
+
+        El primer individuo parte de init, si se da, y el resto del vecino
+        mas cercano desde una ciudad al azar o, si se repiten, de
+        recorridos aleatorios.
+        """
+        n, size = problem.n, self.pop_size
+        pop = np.empty((size, n), dtype=compact(problem.init).dtype)
+        values = np.empty(size)
+        hashes = set()
+        k = attempts = 0
+        while k < size:
+            attempts += 1
+            if init is not None and k == 0:
+                state = init
+            elif attempts <= 2 * size:
+                state = construct.nearest_neighbor(problem,
+                                                   self.rng.randrange(n))
+            else:
+                state = list(range(1, n))
+                self.rng.shuffle(state)
+                state = [0] + state + [0]
+            tour = Tour(state)
+            value = self._improve(problem, tour, problem.obj_val(state),
+                                  range(n), start)
+            node = Node(tour, value)
+            if hash(node) in hashes and attempts <= 4 * size:
+                continue
+            hashes.add(hash(node))
+            pop[k], values[k] = tour.tolist()[:-1], value
+            k += 1
+            if self.exhausted(start):
+                # sin presupuesto: se repiten los individuos ya construidos
+                pop[k:] = pop[np.arange(k, size) % k]
+                values[k:] = values[np.arange(k, size) % k]
+                break
+        return pop, values
+
+    def _evolve(self, problem: TSP, pop: np.ndarray, values: np.ndarray,
+                generations: int, start: float) -> int:
+        """Ejecuta generaciones de una isla, modificando pop y values.
+
+        Retorna la cantidad de hijos que reemplazaron a su padre.
+        """
+        size, n = pop.shape
+        hashes = [hash(Node(np.append(row, row[0]), value))
+                  for row, value in zip(pop, values)]
+        present = set(hashes)
+        accepted = 0
+        for _ in range(generations):
+            order = list(range(size))
+            self.rng.shuffle(order)
+            for idx, i in enumerate(order):
+                if self.exhausted(start, values.max()):
+                    return accepted
+                a, b = pop[i], pop[order[(idx + 1) % size]]
+                if self.crossover == "ox":
+                    child = _order_crossover(self.rng, a, b)
+                else:
+                    child = _edge_assembly(self.rng, problem.dist,
+                                           problem.neighbors, a, b)
+                    if child is None:
+                        continue  # A y B tienen las mismas aristas
+                if self.rng.random() < self.mutation:
+                    p, q = sorted(self.rng.sample(range(n), 2))
+                    child[p:q + 1] = child[p:q + 1][::-1]
+
+                tour = Tour(np.append(child, child[0]))
+                value = self._improve(problem, tour, problem.obj_val(tour),
+                                      _changed(a, tour), start)
+                if value <= values[i]:
+                    continue
+                h = hash(Node(tour, value))
+                if h in present:
+                    continue
+                present.discard(hashes[i])
+                present.add(h)
+                hashes[i] = h
+                pop[i], values[i] = tour.tolist()[:-1], value
+                accepted += 1
+        return accepted
+
+    def _improve(self, problem: TSP, tour: Tour, value: float,
+                 cities, start: float) -> float:
+        """Mejora un recorrido con cadenas 2-opt desde las ciudades dadas."""
+        queue = deque(cities)
+        looking = np.zeros(problem.n, dtype=bool)
+        looking[list(queue)] = True
+        return self._optimize(problem, problem.neighbors, tour, value, queue,
+                              looking, start)
+
+    def _migrate(self, islands: list[tuple[np.ndarray, np.ndarray]]) -> None:
+        """Envia los mejores individuos de cada isla a la siguiente."""
+        elites = [(pop[np.argsort(values)[::-1][:self.migrants]].copy(),
+                   np.sort(values)[::-1][:self.migrants])
+                  for pop, values in islands]
+        for k, (pop, values) in enumerate(islands):
+            rows, vals = elites[k - 1]
+            present = {hash(Node(np.append(row, row[0]), value))
+                       for row, value in zip(pop, values)}
+            worst = np.argsort(values)[:len(rows)]
+            for row, value, w in zip(rows, vals, worst):
+                h = hash(Node(np.append(row, row[0]), value))
+                if h not in present and value > values[w]:
+                    pop[w], values[w] = row, value
+                    present.add(h)
+
+
+class ExactHeldKarp(LocalSearch):
+    """Algoritmo exacto de Held-Karp, por programacion dinamica.
+
+    cost[S, j] es el largo del camino mas corto que sale de la ciudad 0,
+    visita exactamente las ciudades del conjunto S y termina en j (que
+    pertenece a S). Los conjuntos se representan como mascaras de bits de
+    las ciudades 1..n-1 y se procesan por capas de igual cardinalidad:
+    cada capa solo depende de la anterior, asi que las transiciones de una
+    capa se calculan juntas con NumPy. El costo es O(n^2 2^n) en tiempo y
+    O(n 2^n) en memoria, por lo que solo sirve para instancias chicas.
+
+    No es una busqueda local, pero tiene la misma interfaz: self.tour,
+    self.value, self.time, etc. Si se agota el presupuesto antes de
+    terminar, la solucion es el estado inicial del problema.
+    """
+
+    MAX_N = 22  # Cantidad maxima de ciudades
+
+    def __init__(self, moves: tuple[str, ...] = (TWO_OPT,),
+                 rng: Random | np.random.Generator | int | None = None,
+                 time_limit: float | None = None,
+                 max_evals: int | None = None,
+                 max_bytes: int = 1 << 30) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        moves: tuple[str, ...]
+            familias de acciones, se ignora
+        rng: Random | np.random.Generator | int | None
+            generador de numeros aleatorios, se ignora
+        time_limit: float | None
+            tiempo maximo de ejecucion en segundos, None para no limitarlo
+        max_evals: int | None
+            cantidad maxima de transiciones evaluadas, None para no limitarla
+        max_bytes: int
+            memoria maxima para las tablas de la programacion dinamica
+        """
+        super().__init__(moves, rng, time_limit, max_evals)
+        self.max_bytes = max_bytes
+
+    def fits(self, n: int) -> bool:
+        """Determina si se puede resolver una instancia de n ciudades.
+
+        Se requieren a lo sumo MAX_N ciudades y que las tablas, de 9 bytes
+        por entrada, entren en max_bytes.
+        """
+        m = max(n - 1, 0)
+        return n <= self.MAX_N and (1 << m) * m * 9 <= self.max_bytes
+
+    def solve(self, problem: TSP):
+        start = time()
+        super().solve(problem)
+        n = problem.n
+        m = n - 1  # ciudades 1..n-1, la ciudad c es el bit c-1
+        if not self.fits(n):
+            raise ValueError("Held-Karp needs n <= {} cities and fits in "
+                             "{} bytes, got n = {}".format(
+                                 self.MAX_N, self.max_bytes, n))
+        if n <= 3:
+            self.time = time()-start
+            return
+
+        dist = np.asarray(problem.dist[np.arange(n)[:, None], np.arange(n)],
+                          dtype=np.float64)
+        d = dist[1:, 1:]
+        sets = np.arange(1 << m)
+        size = np.zeros(1 << m, dtype=np.int8)
+        for bit in range(m):
+            size += (sets >> bit) & 1
+        layers = np.argsort(size, kind="stable")
+        bounds = np.searchsorted(size[layers], np.arange(m + 2))
+
+        cost = np.full((1 << m, m), np.inf)
+        parent = np.zeros((1 << m, m), dtype=np.int8)
+        cost[1 << np.arange(m), np.arange(m)] = dist[0, 1:]
+
+        for k in range(2, m + 1):
+            if self.exhausted(start):
+                self.time = time()-start
+                return
+            layer = layers[bounds[k]:bounds[k + 1]]
+            for j in range(m):
+                S = layer[(layer >> j) & 1 == 1]
+                # llegar a j desde la mejor ciudad i de S sin j
+                vals = cost[S ^ (1 << j)] + d[:, j]
+                best = np.argmin(vals, axis=1)
+                cost[S, j] = vals[np.arange(len(S)), best]
+                parent[S, j] = best
+                self.nevals += vals.size
+            self.niters += 1
+
+        # cerrar el ciclo y reconstruir el recorrido hacia atras
+        full = (1 << m) - 1
+        j = int(np.argmin(cost[full] + dist[1:, 0]))
+        S, path = full, []
+        while S:
+            path.append(j + 1)
+            S, j = S ^ (1 << j), int(parent[S, j])
+        self.tour = [0] + path[::-1] + [0]
+        self.value = problem.obj_val(self.tour)
+        self.time = time()-start
+
+
+def _edge(u: int, v: int) -> tuple[int, int]:
+    """Arista (u, v) sin orientacion."""
+    return (u, v) if u < v else (v, u)
+
+
+def make_search(name: str, moves: tuple[str, ...] = (TWO_OPT,),
+                rng: Random | np.random.Generator | int | None = None,
+                jobs: int = 1, time_limit: float | None = None
+                ) -> LocalSearch:
+    """Construye un algoritmo a partir de su nombre.
+
+    Argumentos:
+    ==========
+    name: str
+        nombre del algoritmo, uno de ALGO_NAMES
+    moves: tuple[str, ...]
+        familias de acciones que forman el vecindario (TWO_OPT, OR_OPT)
+    rng: Random | np.random.Generator | int | None
+        generador de numeros aleatorios (o semilla)
+    jobs: int
+        cantidad de procesos de los algoritmos con reinicio aleatorio
+    time_limit: float | None
+        tiempo maximo de ejecucion en segundos, None para no limitarlo
+
+    Retorno:
+    =======
+    search: LocalSearch
+        el algoritmo, listo para resolver un problema
+    """
+    if name == HILL_CLIMBING:
+        return HillClimbing(moves, rng, time_limit)
+    if name == HILL_CLIMBING_FIRST:
+        return HillClimbingFirstImprovement(rng=rng, time_limit=time_limit)
+    if name == HILL_CLIMBING_RANDOM_RESET:
+        return HillClimbingReset(moves, jobs, rng=rng, time_limit=time_limit)
+    if name == TABU_SEARCH:
+        return Tabu(moves, rng, time_limit)
+    if name == TABU_RESET:
+        return TabuReset(moves, jobs, rng=rng, time_limit=time_limit)
+    if name == SIMULATED_ANNEALING:
+        return SimulatedAnnealing(rng=rng, time_limit=time_limit)
+    if name == LIN_KERNIGHAN:
+        return LinKernighan(rng=rng, time_limit=time_limit)
+    if name == ITERATED_LOCAL_SEARCH:
+        return IteratedLocalSearch(rng=rng, time_limit=time_limit)
+    if name == GENETIC:
+        return GeneticTSP(rng=rng, time_limit=time_limit, jobs=jobs)
+    if name == EXACT_HELD_KARP:
+        return ExactHeldKarp(time_limit=time_limit)
+    raise ValueError("Unknown algorithm: {}".format(name))
+
+
+# Problema de cada proceso y pedido de detencion de la busqueda que creo el
+# pool, ver RandomReset
+_worker_problem = None
+_worker_stop = None
+
+
+def _init_worker(problem: TSP, stop: ProcessEvent | None = None) -> None:
+    """Guarda el problema y el pedido de detencion, una vez por proceso."""
+    global _worker_problem, _worker_stop
+    _worker_problem = problem
+    _worker_stop = stop
+
+
+def _restart(search: type[LocalSearch], moves: tuple[str, ...], seed: int,
+             reset: bool, deadline: float | None, max_evals: int | None,
+             target: float | None = None, problem: TSP | None = None,
+             stop: Event | ProcessEvent | None = None
+             ) -> tuple[list[int], float, int, int]:
+    """Ejecuta un intento de RandomReset.
+
+    Argumentos:
+    ==========
+    search: type[LocalSearch]
+        clase de la busqueda a ejecutar
+    moves: tuple[str, ...]
+        familias de acciones
+    seed: int
+        semilla del intento
+    reset: bool
+        si se parte de un estado aleatorio o del estado inicial
+    deadline: float | None
+        instante, segun time(), en el que debe terminar el intento
+    max_evals: int | None
+        cantidad maxima de acciones evaluadas en el intento
+    target: float | None
+        valor objetivo suficiente para terminar el intento
+    problem: TSP | None
+        problema a resolver, por defecto el del proceso
+    stop: Event | ProcessEvent | None
+        pedido de detencion a compartir con la busqueda, por defecto el del
+        proceso si se usa su problema, o uno propio
+
+    Retorno:
+    =======
+    tour, value, niters, nevals:
+        la solucion encontrada, su valor objetivo, las iteraciones y
+        las acciones evaluadas
+    """
+    if problem is None:  # intento de un proceso del pool
+        problem = _worker_problem
+        stop = stop if stop is not None else _worker_stop
+    # copia superficial: comparte la matriz de distancias y no modifica
+    # el estado inicial ni el generador del problema original
+    problem = copy(problem)
+    problem.rng = rng = Random(seed)
+    if reset:
+        problem.random_reset()
+    time_limit = None if deadline is None else max(0, deadline - time())
+    solution = search(moves, rng, time_limit=time_limit, max_evals=max_evals)
+    solution.target = target
+    if stop is not None:
+        solution._stop = stop
+    solution.solve(problem)
+    return solution.tour, solution.value, solution.niters, solution.nevals
+
+
+def _island(search: GeneticTSP, pop: np.ndarray | None,
+            values: np.ndarray | None, seed: int, generations: int,
+            deadline: float | None, max_evals: int | None,
+            target: float | None = None, init: list[int] | None = None,
+            problem: TSP | None = None,
+            stop: Event | ProcessEvent | None = None
+            ) -> tuple[np.ndarray, np.ndarray, int, int]:
+    """Ejecuta generaciones de una isla de GeneticTSP.
+
+    Argumentos:
+    ==========
+    search: GeneticTSP
+        la busqueda, de la que se toman los parametros
+    pop, values: np.ndarray | None
+        poblacion de la isla y sus valores objetivo, None para construirla
+    seed: int
+        semilla de estas generaciones
+    generations: int
+        cantidad de generaciones a ejecutar
+    deadline: float | None
+        instante, segun time(), en el que deben terminar
+    max_evals: int | None
+        cantidad maxima de acciones evaluadas
+    target: float | None
+        valor objetivo suficiente para terminar
+    init: list[int] | None
+        estado a incluir en la poblacion inicial
+    problem: TSP | None
+        problema a resolver, con listas de candidatos, por defecto el del
+        proceso
+    stop: Event | ProcessEvent | None
+        pedido de detencion, por defecto el del proceso si se usa su
+        problema, o el de search
+
+    Retorno:
+    =======
+    pop, values, nevals, accepted:
+        la poblacion, sus valores objetivo, las acciones evaluadas y la
+        cantidad de hijos aceptados (toda la poblacion si se construyo)
+    """
+    if problem is None:  # isla de un proceso del pool
+        problem = _worker_problem
+        stop = stop if stop is not None else _worker_stop
+    search = copy(search)
+    if stop is not None:
+        search._stop = stop
+    search.rng = Random(seed)
+    search.time_limit = None if deadline is None else max(0, deadline - time())
+    search.max_evals = max_evals
+    search.target = target
+    search.niters = search.nevals = 0
+    start = time()
+    accepted = 0
+    if pop is None:
+        pop, values = search._populate(problem, init, start)
+        accepted = len(pop)
+    accepted += search._evolve(problem, pop, values, generations, start)
+    return pop, values, search.nevals, accepted
+
+
+def _changed(order: np.ndarray, tour: Tour) -> list[int]:
+    """Ciudades cuyas vecinas en tour difieren de las del recorrido order."""
+    n = len(order)
+    succ, pred = np.empty(n, dtype=np.intp), np.empty(n, dtype=np.intp)
+    succ[order], pred[order] = np.roll(order, -1), np.roll(order, 1)
+    new_succ = tour.order[(tour.pos + 1) % n]
+    new_pred = tour.order[tour.pos - 1]
+    same = (((new_succ == succ) & (new_pred == pred))
+            | ((new_succ == pred) & (new_pred == succ)))
+    return np.flatnonzero(~same).tolist()
+
+
+def _order_crossover(rng: Random, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cruce de orden (OX) de dos recorridos dados como arreglos de ciudades.
+
+    El hijo copia de A el tramo de las posiciones i..j-1, y completa las
+    posiciones j..n-1 y luego 0..i-1 con las demas ciudades, en el orden en
+    que aparecen en B a partir de la posicion j.
+    """
+    n = len(a)
+    i, j = sorted(rng.sample(range(n + 1), 2))
+    child = np.empty(n, dtype=np.intp)
+    child[i:j] = a[i:j]
+    used = np.zeros(n, dtype=bool)
+    used[a[i:j]] = True
+    rest = np.roll(b, -j)
+    rest = rest[~used[rest]]
+    child[j:] = rest[:n - j]
+    child[:i] = rest[n - j:]
+    return child
+
+
+def _edge_assembly(rng: Random, dist: np.ndarray, neighbors: np.ndarray,
+                   a: np.ndarray, b: np.ndarray) -> np.ndarray | None:
+    """Cruce de ensamblado de aristas (EAX) con un unico ciclo AB.
+
+    Retorna el hijo como arreglo de ciudades, o None si A y B tienen las
+    mismas aristas.
+    """
+    n = len(a)
+    a, b = a.tolist(), b.tolist()
+    pa, sa, pb, sb = [0] * n, [0] * n, [0] * n, [0] * n
+    for k in range(n):
+        pa[a[k]], sa[a[k]] = a[k - 1], a[(k + 1) % n]
+        pb[b[k]], sb[b[k]] = b[k - 1], b[(k + 1) % n]
+
+    # aristas de cada padre que no estan en el otro
+    rest = ([[v for v in (pa[c], sa[c]) if v != pb[c] and v != sb[c]]
+             for c in range(n)],
+            [[v for v in (pb[c], sb[c]) if v != pa[c] and v != sa[c]]
+             for c in range(n)])
+
+    # Ciclos AB: caminos que alternan aristas de A (indices pares del
+    # camino) y de B (impares); se cierra un ciclo al volver a una ciudad
+    # en un indice de la misma paridad.
+    cycles = []
+    for s in range(n):
+        while rest[0][s]:
+            path, seen = [s], {(s, 0): 0}
+            while True:
+                cur = path[-1]
+                edges = rest[(len(path) - 1) % 2]
+                v = edges[cur].pop(rng.randrange(len(edges[cur])))
+                edges[v].remove(cur)
+                path.append(v)
+                last = len(path) - 1
+                j = seen.get((v, last % 2))
+                if j is None:
+                    seen[(v, last % 2)] = last
+                    continue
+                cycles.append((path[j:], j % 2))
+                for idx in range(j + 1, last):
+                    del seen[(path[idx], idx % 2)]
+                del path[j + 1:]
+                if len(path) == 1 and not rest[0][s]:
+                    break
+    if not cycles:
+        return None
+
+    # aplicar a A un ciclo AB al azar
+    adj = [[pa[c], sa[c]] for c in range(n)]
+    cycle, first = rng.choice(cycles)
+    for k in range(len(cycle) - 1):
+        u, v = cycle[k], cycle[k + 1]
+        if (first + k) % 2 == 0:
+            adj[u].remove(v)
+            adj[v].remove(u)
+        else:
+            adj[u].append(v)
+            adj[v].append(u)
+
+    # subtours resultantes
+    comp, comps = [-1] * n, {}
+    for c in range(n):
+        if comp[c] >= 0:
+            continue
+        members, cur = [], c
+        while comp[cur] < 0:
+            comp[cur] = c
+            members.append(cur)
+            cur = adj[cur][0] if comp[adj[cur][0]] < 0 else adj[cur][1]
+        comps[c] = members
+
+    # unir el subtour mas chico con otro, con el 2-opt mas barato
+    while len(comps) > 1:
+        label = min(comps, key=lambda c: len(comps[c]))
+        members = comps.pop(label)
+        best = None
+        for u in members:
+            for v in neighbors[u].tolist():
+                if comp[v] == label:
+                    continue
+                for u2 in adj[u]:
+                    for v2 in adj[v]:
+                        delta = (dist[u, v] + dist[u2, v2]
+                                 - dist[u, u2] - dist[v, v2])
+                        if best is None or delta < best[0]:
+                            best = (delta, u, u2, v, v2)
+        if best is None:
+            # ningun candidato fuera del subtour: la ciudad mas cercana
+            u = members[0]
+            row = np.array(dist[u], dtype=np.float64)
+            row[members] = np.inf
+            v = int(np.argmin(row))
+            best = (0, u, adj[u][0], v, adj[v][0])
+        _, u, u2, v, v2 = best
+        adj[u].remove(u2)
+        adj[u2].remove(u)
+        adj[v].remove(v2)
+        adj[v2].remove(v)
+        adj[u].append(v)
+        adj[v].append(u)
+        adj[u2].append(v2)
+        adj[v2].append(u2)
+        for c in members:
+            comp[c] = comp[v]
+        comps[comp[v]].extend(members)
+
+    # recorrer el hijo desde la ciudad 0
+    order, prev, cur = [0], -1, 0
+    for _ in range(n - 1):
+        nxt = adj[cur][0] if adj[cur][0] != prev else adj[cur][1]
+        order.append(nxt)
+        prev, cur = cur, nxt
+    return np.array(order, dtype=np.intp)
+
+
+def neighborhood(problem: TSP, state,
+                 moves: tuple[str, ...]) -> tuple[list[np.ndarray], np.ndarray]:
+    """Evalua todas las familias de acciones de moves sobre un estado.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        un problema de optimizacion
+    state: State | Tour
+        un estado
+    moves: tuple[str, ...]
+        familias de acciones
+
+    Retorno:
+    =======
+    acts: list[np.ndarray]
+        matriz de acciones de cada familia, en el orden de moves
+    diff: np.ndarray
+        diferencias de valor objetivo de todas las acciones, concatenadas
+        en el mismo orden que acts
+    """
+    acts, diffs = zip(*(problem.val_diff_array(state, m) for m in moves))
+    return list(acts), np.concatenate(diffs)
+
+
+def pick(acts: list[np.ndarray], k: int) -> Action:
+    """Recupera la k-esima accion de un vecindario, ver neighborhood."""
+    for family in acts:
+        if k < len(family):
+            return tuple(family[k].tolist())
+        k -= len(family)
+    raise IndexError(k)
+
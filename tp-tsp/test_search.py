@@ -0,0 +1,46 @@
+"""Pruebas de las busquedas: detencion con varios procesos y calidad de
+Lin-Kernighan en instancias con optimo conocido.
+
+Se ejecutan con `python -m pytest` desde este directorio.
+"""
+
+from threading import Timer
+from time import time
+import numpy as np
+import pytest
+from load import read_tsp
+from problem import TSP, TWO_OPT
+import search
+
+
+def _random_problem(n: int, k: int) -> TSP:
+    """Problema con n ciudades al azar en el plano y k candidatos."""
+    xy = np.random.default_rng(0).random((n, 2)) * 1000
+    dist = np.sqrt(((xy[:, None] - xy[None]) ** 2).sum(axis=-1))
+    p = TSP(dist, k=k, rng=0)
+    p.random_reset()
+    return p
+
+
+@pytest.mark.parametrize("name", [search.HILL_CLIMBING_RANDOM_RESET,
+                                  search.TABU_RESET, search.GENETIC])
+def test_stop_reaches_workers(name):
+    p = _random_problem(2000, 8)
+    algo = search.make_search(name, (TWO_OPT,), 0, jobs=2, time_limit=60)
+    Timer(1.0, algo.stop).start()
+    start = time()
+    algo.solve(p)
+    assert time() - start < 3.0
+    assert algo.value is not None and algo.value > float("-inf")
+
+
+@pytest.mark.parametrize("name, optimum, gap", [("berlin52", 7542, 0.0),
+                                                ("pr76", 108159, 0.02)])
+def test_lin_kernighan_quality(name, optimum, gap):
+    G, _ = read_tsp("instances/{}.tsp".format(name), cache=False)
+    for seed in range(4):
+        p = TSP(G, rng=seed)
+        p.random_reset()
+        algo = search.LinKernighan(rng=seed)
+        algo.solve(p)
+        assert -algo.value <= optimum * (1 + gap)
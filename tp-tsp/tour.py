@@ -0,0 +1,164 @@
+"""Este modulo define la clase Tour.
+
+Tour es una representacion de un estado del TSP pensada para las busquedas
+locales: en lugar de copiar la lista completa en cada movimiento, guarda el
+recorrido en un arreglo de NumPy junto con su arreglo inverso de posiciones
+y aplica los movimientos en el lugar.
+
+* order[p]: ciudad en la posicion p del recorrido (0 <= p < n).
+* pos[c]: posicion de la ciudad c en el recorrido.
+
+El recorrido es ciclico, por lo que al invertir un tramo se invierte el lado
+mas corto (el tramo o su complemento), que produce el mismo ciclo. Por eso
+la ciudad 0 no necesariamente queda en la posicion 0; self.tolist() devuelve
+el estado rotado en el formato [0] ++ permutacion(1,n) ++ [0].
+
+Un Tour puede usarse en lugar de un estado en los metodos de TSP, pues
+np.asarray(tour) devuelve el recorrido cerrado [order[0],...,order[n-1],
+order[0]] sin copiarlo. Las acciones (i, j) se refieren a esas posiciones.
+"""
+
+from __future__ import annotations
+from node import State, Action
+import numpy as np
+
+
+class Tour:
+    """Clase que representa un recorrido con posiciones inversas."""
+
+    def __init__(self, state: State) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        state: State
+            un estado, es decir, un recorrido cerrado
+            [v_0,...,v_n-1,v_0]
+        """
+        self._closed = np.array(state, dtype=np.intp)
+        self.order = self._closed[:-1]  # vista sin la ciudad repetida
+        self.pos = np.empty(len(self.order), dtype=np.intp)
+        self.pos[self.order] = np.arange(len(self.order))
+
+    @property
+    def n(self) -> int:
+        """Cantidad de ciudades del recorrido."""
+        return len(self.order)
+
+    def __len__(self) -> int:
+        """Largo del recorrido cerrado, igual que el de un estado."""
+        return len(self._closed)
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """Recorrido cerrado como arreglo de NumPy, sin copiarlo."""
+        if dtype is None and not copy:
+            return self._closed
+        return np.array(self._closed, dtype=dtype)
+
+    def __repr__(self) -> str:
+        """Representacion de recorridos."""
+        return "<Tour {}>".format(self.tolist())
+
+    def copy(self) -> Tour:
+        """Copia el recorrido."""
+        tour = Tour.__new__(Tour)
+        tour._closed = self._closed.copy()
+        tour.order = tour._closed[:-1]
+        tour.pos = self.pos.copy()
+        return tour
+
+    def tolist(self) -> State:
+        """Devuelve el estado que comienza y termina en la ciudad 0."""
+        p = self.pos[0]
+        rotated = np.concatenate((self.order[p:], self.order[:p + 1]))
+        return rotated.tolist()
+
+    def succ(self, city: int) -> int:
+        """Ciudad siguiente a city en el recorrido."""
+        return int(self.order[(self.pos[city] + 1) % self.n])
+
+    def pred(self, city: int) -> int:
+        """Ciudad anterior a city en el recorrido."""
+        return int(self.order[self.pos[city] - 1])
+
+    def reverse(self, a: int, b: int) -> None:
+        """Invierte el camino a -> ... -> b del recorrido.
+
+        Se invierte el lado mas corto: el camino de a hasta b o su
+        complemento, del sucesor de b al predecesor de a.
+        """
+        n = self.n
+        pa, pb = self.pos[a], self.pos[b]
+        length = (pb - pa) % n + 1
+        if 2 * length > n:
+            pa, length = (pb + 1) % n, n - length
+        if length < 2:
+            return
+        if pa + length <= n:
+            idx = np.arange(pa, pa + length)
+        else:
+            idx = (pa + np.arange(length)) % n
+        cities = self.order[idx[::-1]]
+        self.order[idx] = cities
+        self.pos[cities] = idx
+        self._closed[n] = self._closed[0]
+
+    def two_opt(self, t1: int, t2: int, t3: int, t4: int) -> None:
+        """Reemplaza las aristas (t1, t2) y (t3, t4) por (t1, t3) y (t2, t4).
+
+        Las aristas deben recorrerse en el mismo sentido, es decir,
+        t2 = succ(t1) y t4 = succ(t3), o bien t2 = pred(t1) y t4 = pred(t3).
+        """
+        if self.succ(t1) == t2:
+            self.reverse(t2, t3)
+        else:
+            self.reverse(t1, t4)
+
+    def double_bridge(self, p: int, l1: int, l2: int) -> None:
+        """Intercambia dos tramos consecutivos del recorrido.
+
+        Los tramos B y C empiezan en la posicion p+1 y tienen l1 y l2
+        ciudades: el recorrido A B C D pasa a ser A C B D. El costo es
+        proporcional a l1 + l2, con l1 + l2 <= n-2.
+        """
+        n = self.n
+        idx = (p + 1 + np.arange(l1 + l2)) % n
+        cities = self.order[idx]
+        cities = np.concatenate((cities[l1:], cities[:l1]))
+        self.order[idx] = cities
+        self.pos[cities] = idx
+        self._closed[n] = self._closed[0]
+
+    def move(self, action: Action) -> None:
+        """Aplica en el lugar una accion sobre las posiciones.
+
+        La accion puede ser 2-opt (i, j) u Or-opt (i, j, k, r).
+        """
+        if len(action) == 4:
+            self.or_opt(action)
+            return
+        i, j = action
+        self.reverse(int(self.order[i + 1]), int(self.order[j]))
+
+    def or_opt(self, action: Action) -> None:
+        """Aplica en el lugar una accion Or-opt (i, j, k, r).
+
+        Mueve el tramo de las posiciones i+1..j entre las posiciones k y
+        k+1, desplazando las ciudades intermedias. Como los tramos son
+        cortos, el costo es proporcional a la distancia entre j y k.
+        """
+        i, j, k, r = (int(x) for x in action)
+        length = j - i
+        segment = self.order[i+1: j+1].copy()
+        if r:
+            segment = segment[::-1]
+        if k > j:
+            self.order[i+1: k+1-length] = self.order[j+1: k+1].copy()
+            self.order[k+1-length: k+1] = segment
+            lo, hi = i + 1, k + 1
+        else:
+            self.order[k+1+length: j+1] = self.order[k+1: i+1].copy()
+            self.order[k+1: k+1+length] = segment
+            lo, hi = k + 1, j + 1
+        self.pos[self.order[lo:hi]] = np.arange(lo, hi)
+        self._closed[self.n] = self._closed[0]